@@ -0,0 +1,143 @@
+import argparse
+import os
+from dotenv import load_dotenv
+from mysql_client import connect_mysql
+from TableSetup import insert_frame, invalidate_schema, read_csv_chunks
+
+# Load environment variables
+load_dotenv(".env")
+
+ROLLUP_TABLES = {
+    "movie_rating_stats": """
+        CREATE TABLE IF NOT EXISTS movie_rating_stats (
+            `movieid` INT PRIMARY KEY,
+            `rating_count` INT NOT NULL,
+            `rating_sum` DECIMAL(14,1) NOT NULL,
+            `avg_rating` DECIMAL(6,4) NOT NULL,
+            KEY `idx_movie_rating_stats_avg` (`avg_rating`)
+        )
+    """,
+    "genre_rating_stats": """
+        CREATE TABLE IF NOT EXISTS genre_rating_stats (
+            `genre` VARCHAR(255) PRIMARY KEY,
+            `movie_count` INT NOT NULL,
+            `rating_count` INT NOT NULL,
+            `avg_rating` DECIMAL(6,4) NOT NULL
+        )
+    """,
+    "year_rating_stats": """
+        CREATE TABLE IF NOT EXISTS year_rating_stats (
+            `release_year` SMALLINT PRIMARY KEY,
+            `movie_count` INT NOT NULL,
+            `rating_count` INT NOT NULL,
+            `avg_rating` DECIMAL(6,4) NOT NULL
+        )
+    """,
+}
+
+def create_rollup_tables(cursor):
+    for ddl in ROLLUP_TABLES.values():
+        cursor.execute(ddl)
+
+# Genre and year rollups are rebuilt from movie_rating_stats, which has one
+# row per movie, so they stay cheap even when `ratings` is huge
+def refresh_derived_rollups(cursor):
+    cursor.execute("DELETE FROM genre_rating_stats")
+    cursor.execute("""
+        INSERT INTO genre_rating_stats (genre, movie_count, rating_count, avg_rating)
+        SELECT g.`genre`, COUNT(*), SUM(s.`rating_count`), SUM(s.`rating_sum`) / SUM(s.`rating_count`)
+        FROM movie_rating_stats s
+        JOIN movie_genres g ON g.`movieid` = s.`movieid`
+        GROUP BY g.`genre`
+    """)
+
+    cursor.execute("DELETE FROM year_rating_stats")
+    cursor.execute("""
+        INSERT INTO year_rating_stats (release_year, movie_count, rating_count, avg_rating)
+        SELECT m.`release_year`, COUNT(*),
+               SUM(s.`rating_count`), SUM(s.`rating_sum`) / SUM(s.`rating_count`)
+        FROM movie_rating_stats s
+        JOIN movies_clean m ON m.`movieid` = s.`movieid`
+        WHERE m.`release_year` IS NOT NULL
+        GROUP BY m.`release_year`
+    """)
+
+# Full rebuild of every rollup from `ratings`
+def rebuild_rollups():
+    db_name = os.getenv("DB_MOVIELENS")
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+    try:
+        create_rollup_tables(cursor)
+        cursor.execute("DELETE FROM movie_rating_stats")
+        cursor.execute("""
+            INSERT INTO movie_rating_stats (movieid, rating_count, rating_sum, avg_rating)
+            SELECT `movieid`, COUNT(*), SUM(`rating`), AVG(`rating`)
+            FROM ratings
+            GROUP BY `movieid`
+        """)
+        movies = cursor.rowcount
+        refresh_derived_rollups(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    invalidate_schema(db_name)
+    print(f"✅ Rebuilt rating rollups for {movies} movies.")
+    return movies
+
+# Folds a DataFrame of newly inserted ratings into movie_rating_stats
+def apply_rating_delta(cursor, ratings_df):
+    delta = ratings_df.groupby("movieid")["rating"].agg(["count", "sum"]).reset_index()
+    rows = [(int(m), int(c), float(s), float(s) / int(c)) for m, c, s in delta.itertuples(index=False)]
+    # MySQL applies ON DUPLICATE KEY assignments left to right, so avg_rating
+    # sees the already-updated count and sum
+    cursor.executemany("""
+        INSERT INTO movie_rating_stats (movieid, rating_count, rating_sum, avg_rating)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            rating_count = rating_count + VALUES(rating_count),
+            rating_sum = rating_sum + VALUES(rating_sum),
+            avg_rating = rating_sum / rating_count
+    """, rows)
+    return len(rows)
+
+# Appends a CSV of new ratings to `ratings` and updates the rollups
+# incrementally; falls back to a full rebuild if any batch failed to insert
+def append_ratings(csv_file):
+    db_name = os.getenv("DB_MOVIELENS")
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+    inserted, failed, offset = 0, 0, 0
+    try:
+        create_rollup_tables(cursor)
+        for chunk in read_csv_chunks(csv_file):
+            ok, bad = insert_frame(conn, cursor, "ratings", chunk, offset)
+            inserted, failed, offset = inserted + ok, failed + bad, offset + len(chunk)
+            if not failed:
+                apply_rating_delta(cursor, chunk)
+                conn.commit()
+        if not failed:
+            refresh_derived_rollups(cursor)
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"✅ Appended {inserted} ratings. Failed inserts: {failed}")
+    if failed:
+        print("⚠️ Some ratings failed to insert; rebuilding rollups from scratch.")
+        rebuild_rollups()
+    return inserted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the MovieLens rating rollup tables")
+    parser.add_argument(
+        "--append", metavar="CSV",
+        help="Append new ratings from this CSV and update the rollups incrementally"
+    )
+    args = parser.parse_args()
+    if args.append:
+        append_ratings(args.append)
+    else:
+        rebuild_rollups()
@@ -1,44 +1,76 @@
-import mysql.connector
+import pandas as pd
+import argparse
 import os
-import ast
+from TableSetup import insert_frame, invalidate_schema
+from mysql_client import connect_mysql
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv(".env")
 
-def connect_mysql(force_db=None):
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=force_db or os.getenv("ACTIVE_DB")
-    )
-
-def populate_movie_genres():
+# Mirrors ChatDBFixes.sql: movie_genres needs a primary key on movies_clean for its FK
+def create_movie_genres_table():
     conn = connect_mysql(os.getenv("DB_MOVIELENS"))
     cursor = conn.cursor()
 
-    cursor.execute("SELECT movieid, genres FROM movies_clean")
-    rows = cursor.fetchall()
-
-    insert_query = "INSERT INTO movie_genres (movieid, genre) VALUES (%s, %s)"
-    success, failed = 0, 0
-
-    for movieid, genre_list in rows:
-        try:
-            if genre_list and genre_list.strip() and genre_list != '(no genres listed)':
-                genres = ast.literal_eval(genre_list)
-                for genre in genres:
-                    cursor.execute(insert_query, (movieid, genre.strip()))
-                    success += 1
-        except Exception as e:
-            print(f"⚠️ Skipped movieid {movieid}: {e}")
-            failed += 1
+    cursor.execute("SHOW KEYS FROM movies_clean WHERE Key_name = 'PRIMARY'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE movies_clean ADD PRIMARY KEY (movieid)")
 
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS movie_genres (
+            `movieid` INT,
+            `genre` VARCHAR(255),
+            FOREIGN KEY (`movieid`) REFERENCES `movies_clean`(`movieid`)
+        )
+    """)
     conn.commit()
     cursor.close()
     conn.close()
-    print(f"✅ Inserted {success} genres. ❌ Failed: {failed}")
+    invalidate_schema(os.getenv("DB_MOVIELENS"))
+
+# Turns movies_clean.genres ("['Adventure', 'Animation']" or "Adventure|Animation")
+# into one (movieid, genre) row per genre with vectorized string ops
+def explode_genres(movies):
+    genres = movies["genres"].fillna("").astype(str).str.strip()
+    parsed = genres.str.findall(r"""['"]([^'"]+)['"]""")
+    parsed = parsed.where(genres.str.startswith("["), genres.str.split("|"))
+
+    pairs = pd.DataFrame({"movieid": movies["movieid"], "genre": parsed}).explode("genre")
+    pairs["genre"] = pairs["genre"].str.strip()
+    return pairs[pairs["genre"].notna() & (pairs["genre"] != "")]
+
+# Rebuilds movie_genres from movies_clean. With incremental=True only movies
+# that have no movie_genres rows yet (i.e. added since the last run) are touched.
+def populate_movie_genres(incremental=False):
+    conn = connect_mysql(os.getenv("DB_MOVIELENS"))
+    cursor = conn.cursor()
+
+    if incremental:
+        cursor.execute("""
+            SELECT m.movieid, m.genres
+            FROM movies_clean m
+            LEFT JOIN movie_genres g ON g.movieid = m.movieid
+            WHERE g.movieid IS NULL
+        """)
+    else:
+        cursor.execute("DELETE FROM movie_genres")
+        cursor.execute("SELECT movieid, genres FROM movies_clean")
+    movies = pd.DataFrame(cursor.fetchall(), columns=["movieid", "genres"])
+
+    try:
+        success, failed = insert_frame(conn, cursor, "movie_genres", explode_genres(movies))
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"✅ Inserted {success} genres for {len(movies)} movies. ❌ Failed: {failed}")
+    return success
 
 if __name__ == "__main__":
-    populate_movie_genres()
+    parser = argparse.ArgumentParser(description="Populate the movie_genres table")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only add genres for movies that are not in movie_genres yet"
+    )
+    args = parser.parse_args()
+    populate_movie_genres(incremental=args.incremental)
@@ -1,16 +1,28 @@
-from TableSetup import connect_mysql, get_schema
+from TableSetup import get_schema, get_schema_columns, get_schema_fingerprint
+from translation_cache import TranslationCache
+from semantic_cache import SemanticCache
+from fast_path import match_sql
+from schema_pruner import prune_sql_schema
+from router import route
+from synonyms import SynonymNormalizer
+from mysql_client import connect_mysql
+from result_stream import iter_sql_rows, write_rows, summarize
+from index_advisor import log_query
+from query_guard import SqlPager, QueryTooExpensive, check_sql_cost, explain_sql, is_select
 import mysql.connector
-import openai
+from concurrent.futures import ThreadPoolExecutor
+from openai_client import chat_completion, client_stats
 from dotenv import load_dotenv
 import os
-import re
 
 # Load environment variables
 load_dotenv(".env")
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
 
-query_cache = {}
+# NL→SQL translations persisted across runs; keyed by question + database + schema
+query_cache = TranslationCache("sql")
+# Near-duplicate phrasings of already-translated questions
+similar_queries = SemanticCache(source=query_cache)
 
 # Find synonyms:
 COUNTRY_SYNONYMS = {
@@ -24,30 +36,115 @@ COUNTRY_SYNONYMS = {
     "u.k.": "united kingdom",
 }
 
+# Optional extra alias table (JSON object or alias,canonical CSV/TSV) for
+# countries, genres, titles, ...
+SYNONYMS_FILE = os.getenv("SYNONYMS_FILE")
+
+query_synonyms = SynonymNormalizer(COUNTRY_SYNONYMS)
+if SYNONYMS_FILE:
+    try:
+        print(f"Loaded {query_synonyms.load_file(SYNONYMS_FILE)} synonyms.")
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not load synonyms from {SYNONYMS_FILE}: {e}")
+
 # replaces country name variations — like converting 'USA' to 'united states'
 def normalize_query_input(nl_query):
-    for user_term, db_term in COUNTRY_SYNONYMS.items():
-        pattern = re.compile(rf'\b{re.escape(user_term)}\b', re.IGNORECASE)
-        nl_query = pattern.sub(db_term, nl_query)
-    return nl_query
-
-# infers the desired database
-def infer_database(nl_query: str) -> str:
-    q = nl_query.lower()
-    if "sars" in q or "country" in q:
-        return os.getenv("DB_SARS")
-    elif "movie" in q or "rating" in q or "genre" in q:
-        return os.getenv("DB_MOVIELENS")
-    else:
-        return os.getenv("DB_NAME")  # default
+    return query_synonyms.normalize(nl_query)
+
+# the last paged SELECT, so "more" can continue where it stopped
+_last_page = None
+
+# (table, column) pairs that are a table's whole primary key, for keyset paging
+def _unique_columns(db_name):
+    unique = set()
+    for table, columns in get_schema_columns(db_name).items():
+        primary = [column for column, _, key in columns if key == "PRI"]
+        if len(primary) == 1:
+            unique.add((table, primary[0]))
+    return unique
+
+# asks the model for a cheaper equivalent of an expensive query (cost gate "rewrite" policy)
+def cheaper_rewrite(target_db):
+    def rewrite(sql_query, report):
+        response = chat_completion(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": "You are an expert MySQL assistant that returns only executable SQL queries."},
+                {"role": "user", "content": f"""
+        This MySQL query is expensive ({report.describe()}). Rewrite it to return the
+        same result while examining fewer rows (sargable filters, aggregate before joining,
+        avoid sorting the full table). Return only executable SQL.
+
+        Schema:
+        {get_schema(target_db)}
+
+        Query:
+        {sql_query}
+        """}
+            ],
+            max_tokens=300
+        )
+        return response.choices[0].message.content.replace("```sql", "").replace("```", "").strip()
+    return rewrite
+
+# runs the pager's next page and streams it to `out`
+def _run_page(pager, target_db, out=None):
+    global _last_page
+
+    conn = connect_mysql(target_db)
+    cursor = conn.cursor()
+    last_row = []
+
+    def format_row(row):
+        last_row[:] = [row]
+        return ", ".join(str(item) for item in row)
+
+    try:
+        if pager.position == 0:
+            checked = check_sql_cost(cursor, pager.query, rewrite=cheaper_rewrite(target_db))
+            if checked != pager.query:
+                print(f"\nRewritten SQL Query:\n{checked}")
+                pager = SqlPager(checked, pager.page_size, _unique_columns(target_db))
+        sql_query, params = pager.page_sql()
+        cursor.execute(sql_query, params)
+        columns = [desc[0] for desc in cursor.description]
+        count, more = write_rows(iter_sql_rows(cursor), out, pager.page_rows, format_row)
+        if more:
+            # discard the unread remainder so the pooled connection is reusable
+            conn.consume_results()
+    except QueryTooExpensive as err:
+        return str(err)
+    except mysql.connector.Error as err:
+        return f"SQL Error: {err}"
+    finally:
+        cursor.close()
+        conn.close()
 
-# database execution
-def execute_sql_query(natural_query):
+    pager.record(count, last_row[0] if last_row else None, columns, more)
+    _last_page = (pager, target_db) if not pager.done else None
+    summary = summarize(count, more)
+    return summary + " Type 'more' for the next page." if more else summary
+
+# continues the last SELECT that had more rows than one page
+def fetch_next_page(out=None):
+    if _last_page is None:
+        return "No more rows."
+    pager, target_db = _last_page
+    return _run_page(pager, target_db, out)
+
+# database execution; SELECT results are streamed to `out` (stdout by default)
+# in fetchmany batches, one page of max_rows at a time
+def execute_sql_query(natural_query, out=None, max_rows=None):
     normalized_query = normalize_query_input(natural_query)
 
     # nl_to_sql now auto-infers the db internally
     sql_query, target_db = nl_to_sql(normalized_query)
     print(f"\nGPT-Generated SQL Query:\n{sql_query}")
+    log_query(target_db, sql_query)
+
+    if is_select(sql_query):
+        pager = SqlPager(sql_query, max_rows, _unique_columns(target_db))
+        return _run_page(pager, target_db, out)
 
     conn = connect_mysql(target_db)
     cursor = conn.cursor()
@@ -61,9 +158,10 @@ def execute_sql_query(natural_query):
         cursor.execute(sql_query)
 
         if cursor.description:
-            results = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description]
-            return "\n".join([", ".join(str(item) for item in row) for row in results]) if results else "No results."
+            count, more = write_rows(iter_sql_rows(cursor), out, max_rows)
+            if more:
+                conn.consume_results()
+            return summarize(count, more)
 
         conn.commit()
     except mysql.connector.Error as err:
@@ -74,23 +172,74 @@ def execute_sql_query(natural_query):
 
     return "Query executed."
 
+# returns (sql, database) for a question: a local template if one matches,
+# otherwise the routed database's translation
+def nl_to_sql(natural_query):
+    # Common templated questions are answered locally without the LLM
+    templated = match_sql(natural_query)
+    if templated is not None:
+        sql_query, db_env = templated
+        print("Answered from a local query template.")
+        return sql_query, os.getenv(db_env)
+
+    ranked, confident = route(natural_query)
+    candidates = [os.getenv(db_env) for db_env, _ in ranked]
+    scores = ", ".join(f"{os.getenv(db_env)} {confidence:.2f}" for db_env, confidence in ranked)
+    if confident or len(set(candidates)) < 2:
+        print(f"Routing to {candidates[0]} ({scores}).")
+        return translate_sql(natural_query, candidates[0]), candidates[0]
+
+    # Uncertain: translate against every candidate at once and keep the
+    # best-ranked translation that survives an EXPLAIN
+    print(f"Routing uncertain ({scores}); translating against {', '.join(candidates)}.")
+    with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+        results = list(pool.map(lambda db: _translate_and_validate(natural_query, db), candidates))
+    for db_name, (sql_query, error) in zip(candidates, results):
+        if error is None:
+            print(f"Routing chose {db_name}.")
+            return sql_query, db_name
+        print(f"⚠️ Query for {db_name} failed validation: {error}")
+    print(f"No translation validated; using {candidates[0]}.")
+    return results[0][0], candidates[0]
+
+def _translate_and_validate(natural_query, db_name):
+    sql_query = translate_sql(natural_query, db_name)
+    return sql_query, validate_sql(db_name, sql_query)
+
+# EXPLAINs a generated SELECT against `db_name`; returns the error, or None if
+# it is valid (statements EXPLAIN cannot check are assumed valid)
+def validate_sql(db_name, sql_query):
+    if not is_select(sql_query):
+        return None
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+    try:
+        explain_sql(cursor, sql_query)
+        return None
+    except mysql.connector.Error as err:
+        return str(err)
+    finally:
+        cursor.close()
+        conn.close()
+
 # takes the user's natural language query, passes it to
 # the OpenAI API with a detailed prompt that includes the
-# schema, and returns the resulting SQL. Some parts are
-# customized to fit outliers.
-def nl_to_sql(natural_query):
-    if natural_query in query_cache:
+# schema, and returns the resulting SQL for `db_name`. Some
+# parts are customized to fit outliers.
+def translate_sql(natural_query, db_name):
+    cache_scope = f"{db_name}:{get_schema_fingerprint(db_name)}"
+    cached_sql = query_cache.get(natural_query, cache_scope)
+    if cached_sql is not None:
         print("Returning cached SQL query.")
-        return query_cache[natural_query], infer_database(natural_query)
+        return cached_sql
 
-    # Automatically infer the correct database
-    query_lower = natural_query.lower()
-    if any(keyword in query_lower for keyword in ["sars", "country", "taiwan", "china", "deaths", "recovered", "imported", "fatalities"]):
-        db_name = os.getenv("DB_SARS")
-    else:
-        db_name = os.getenv("DB_MOVIELENS")
+    match = similar_queries.lookup(natural_query, cache_scope)
+    if match is not None:
+        cached_sql, similarity, cached_question = match
+        print(f"Returning SQL cached for similar question \"{cached_question}\" (similarity {similarity:.2f}).")
+        return cached_sql
 
-    schema = get_schema(db_name)
+    schema = prune_sql_schema(natural_query, get_schema_columns(db_name))
 
     # SARS-specific prompt logic
     if db_name == os.getenv("DB_SARS"):
@@ -134,8 +283,15 @@ def nl_to_sql(natural_query):
         - When the user asks for 'no genre listed' or 'no genre' when searching, aggregate on genre: (no genres listed).
         - Use `SHOW TABLES` or 
           `SELECT table_name FROM information_schema.tables WHERE table_schema = '{db_name}'` to list tables.
-        - If the user asks about the release year, extract it from `title` using:
-            CAST(SUBSTRING(`title`, -5, 4) AS UNSIGNED)
+        - If the user asks about the release year, filter, group or sort on the indexed
+          `movies_clean`.`release_year` column — never derive the year from `title`.
+        - `movies_clean`.`clean_title` is the title without the "(year)" suffix; use it for exact title matches.
+        - Precomputed rating rollups exist; prefer them over aggregating `ratings`:
+            • `movie_rating_stats` (`movieid`, `rating_count`, `rating_sum`, `avg_rating`) — one row per movie;
+              join `movies_clean` on `movieid` for titles, or `movie_genres` on `movieid` to rank within a genre.
+            • `genre_rating_stats` (`genre`, `movie_count`, `rating_count`, `avg_rating`) — average rating per genre.
+            • `year_rating_stats` (`release_year`, `movie_count`, `rating_count`, `avg_rating`) — per release year.
+          Only query `ratings` directly for per-user questions or individual ratings.
         - If "attribute" in user_input or "column name" in user_input or "fields" in user_input or "schema" in user_input:
             return "SHOW COLUMNS FROM movies_clean;"
 
@@ -143,11 +299,11 @@ def nl_to_sql(natural_query):
         - When filtering by movie title, use LIKE '%<title>%' to allow partial title matching and avoid requiring exact year formatting.
         - If the user asks “which items have the highest rating?”, return all tied rows by comparing against the maximum (e.g., WHERE avg_rating = (SELECT MAX(...))) — do NOT use LIMIT 1.
         - If the user asks to “list the top N” or “top-rated” or “highest rated”, use:
-            • GROUP BY the entity (e.g., `movieid`)
-            • Aggregate with AVG(rating)
-            • ORDER BY avg_rating DESC
+            • Read `movie_rating_stats` and ORDER BY `movie_rating_stats`.`avg_rating` DESC — do not GROUP BY or AVG over `ratings`
+            • JOIN `movies_clean` on `movieid` to return titles
+            • For a genre (e.g., “top 10 Horror movies”), also JOIN `movie_genres` on `movieid` and filter on `movie_genres`.`genre`
             • Use LIMIT N (and OFFSET if requested)
-            • Order ties lexicographically by title if needed
+            • Order ties lexicographically by `movies_clean`.`title`
             - When the user asks to skip top results (e.g., “AFTER the top 10”, “skipping the first 5”), use `LIMIT` and `OFFSET` directly instead of subqueries.
 
 
@@ -162,7 +318,7 @@ def nl_to_sql(natural_query):
         SQL Query:
         """
 
-    response = openai.chat.completions.create(
+    response = chat_completion(
         model="gpt-3.5-turbo",
         messages=[
             {"role": "system", "content": "You are an expert MySQL assistant that returns only executable SQL queries."},
@@ -173,16 +329,26 @@ def nl_to_sql(natural_query):
 
     sql_query = response.choices[0].message.content.strip()
     sql_query = sql_query.replace("```sql", "").replace("```", "").strip()
-    query_cache[natural_query] = sql_query
+    query_cache.put(natural_query, sql_query, cache_scope)
+    similar_queries.add(natural_query, sql_query, cache_scope)
 
-    return sql_query, db_name
+    return sql_query
 
 if __name__ == "__main__":
     while True:
         user_input = input("Enter your natural language query: ")
         if user_input.lower() in ("quit", "exit"):
+            stats = query_cache.stats()
+            print(f"Translation cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries.")
+            print(f"Similar-question hits: {similar_queries.stats()['hits']}")
+            print(f"Synonym replacements: {query_synonyms.stats()['hits']}")
+            llm = client_stats()
+            print(f"LLM calls: {llm['calls']}, avg {llm['avg_ms']:.0f} ms ({llm['avg_overhead_ms']:.0f} ms outside the model).")
             print("Exiting ChatDB. Goodbye.")
             break
+        if user_input.strip().lower() == "more":
+            print(fetch_next_page())
+            continue
 
         print(execute_sql_query(user_input))
 
@@ -1,152 +1,509 @@
 import mysql.connector
 import pandas as pd
+import argparse
 import os
 import re
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dotenv import load_dotenv
+from mysql_client import connect_mysql
 
 # Load environment variables
 load_dotenv(".env")
 
 # --- Utility Functions ---
 
-def connect_mysql(force_db=None):
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=force_db or os.getenv("ACTIVE_DB")
-    )
-
 def clean_column_names(columns):
     return [re.sub(r"[^\w]", "", col.strip().lower().replace(" ", "_")) for col in columns if pd.notna(col)]
 
 # --- CSV to Table Creation ---
 
-def create_table_from_csv(csv_file, db_name):
-    df = pd.read_csv(csv_file)
+# Rows per pd.read_csv chunk; the first chunk doubles as the type-inference sample
+CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "50000"))
+
+SARS_COLUMNS = [
+    'date',
+    'country',
+    'cumulative_number_of_cases',
+    'number_of_deaths',
+    'number_recovered'
+]
+
+SARS_SUMMARY_COLUMNS = [
+    'countryregion',
+    'cumulative_male_cases',
+    'cumulative_female_cases',
+    'cumulative_total_cases',
+    'no_of_deaths',
+    'case_fatalities_ratio_',
+    'date_onset_first_probable_case',
+    'date_onset_last_probable_case',
+    'median_age',
+    'age_range',
+    'number_of_imported_cases',
+    'percentage_of_imported_cases',
+    'number_of_hcw_affected',
+    'percentage_of_hcw_affected'
+]
+
+def table_name_for(csv_file):
+    return os.path.splitext(os.path.basename(csv_file))[0]
+
+# Columns computed at load time so queries can filter on them directly
+# instead of re-deriving them from `title` per row
+TITLE_YEAR = r"\((\d{4})\)\s*$"
+DERIVED_COLUMN_SQL = {
+    "movies_clean": """
+        UPDATE `movies_clean`
+        SET `release_year` = CAST(REGEXP_SUBSTR(REGEXP_SUBSTR(`title`, '\\\\([0-9]{4}\\\\)[[:space:]]*$'), '[0-9]{4}') AS UNSIGNED),
+            `clean_title` = TRIM(REGEXP_REPLACE(`title`, '[[:space:]]*\\\\([0-9]{4}\\\\)[[:space:]]*$', ''))
+    """,
+}
+# Derived columns that stay NULL (rather than 0) when they cannot be computed
+NULLABLE_COLUMNS = {"release_year"}
+
+def derive_columns(df, table_name):
+    if table_name == "movies_clean" and "title" in df.columns:
+        df = df.copy()
+        titles = df["title"].astype(str)
+        df["release_year"] = pd.to_numeric(titles.str.extract(TITLE_YEAR)[0]).astype("Int64")
+        df["clean_title"] = titles.str.replace(r"\s*" + TITLE_YEAR, "", regex=True).str.strip()
+    return df
+
+# applies the column naming rules shared by table creation and insertion
+def prepare_frame(df, csv_file, derive=True):
     df = df.loc[:, df.columns.notna()]
     df = df.dropna(how='all')
 
     if "sars_2003_complete_dataset_clean" in csv_file.lower():
-        df.columns = [
-            'date',
-            'country',
-            'cumulative_number_of_cases',
-            'number_of_deaths',
-            'number_recovered'
-        ]
+        df.columns = SARS_COLUMNS
     elif "summary_data_clean" in csv_file.lower():
-        df.columns = [
-            'countryregion',
-            'cumulative_male_cases',
-            'cumulative_female_cases',
-            'cumulative_total_cases',
-            'no_of_deaths',
-            'case_fatalities_ratio_',
-            'date_onset_first_probable_case',
-            'date_onset_last_probable_case',
-            'median_age',
-            'age_range',
-            'number_of_imported_cases',
-            'percentage_of_imported_cases',
-            'number_of_hcw_affected',
-            'percentage_of_hcw_affected'
-        ]
+        df.columns = SARS_SUMMARY_COLUMNS
     else:
         df.columns = clean_column_names(df.columns)
 
     df.columns = df.columns.astype(str)
     df = df.loc[:, (df.columns != 'nan') & (df.columns != '')]
+    return derive_columns(df, table_name_for(csv_file)) if derive else df
 
-    table_name = os.path.splitext(os.path.basename(csv_file))[0]
+def read_csv_chunks(csv_file, chunk_size=None):
+    for chunk in pd.read_csv(csv_file, chunksize=chunk_size or CHUNK_SIZE):
+        yield prepare_frame(chunk, csv_file)
 
-    conn = connect_mysql(db_name)
-    cursor = conn.cursor()
+# Like read_csv_chunks, but yields (raw_row_count, prepared_chunk) so callers
+# can tell a short file from a chunk that lost blank lines in prepare_frame
+def read_csv_chunks_counted(csv_file, chunk_size=None):
+    for chunk in pd.read_csv(csv_file, chunksize=chunk_size or CHUNK_SIZE):
+        yield len(chunk), prepare_frame(chunk, csv_file)
 
-    column_definitions = []
-    for col, dtype in df.dtypes.items():
-        if "int" in str(dtype):
-            column_definitions.append(f"`{col}` INT")
-        elif "float" in str(dtype):
-            column_definitions.append(f"`{col}` FLOAT")
-        else:
-            column_definitions.append(f"`{col}` TEXT")
+# --- Type inference ---
+
+INTEGER_TYPES = [
+    ("TINYINT", 127),
+    ("SMALLINT", 32767),
+    ("MEDIUMINT", 8388607),
+    ("INT", 2147483647),
+    ("BIGINT", 9223372036854775807),
+]
+# Largest VARCHAR that can still be fully indexed (3072-byte key limit, utf8mb4)
+MAX_VARCHAR = 768
+ISO_DATE = r"^\d{4}-\d{2}-\d{2}$"
+ISO_DATETIME = r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2})?$"
+
+def _integer_type(column, largest):
+    # ID columns stay at least INT so foreign keys (e.g. movie_genres.movieid) match
+    floor = 3 if column.endswith("id") else 0
+    for name, limit in INTEGER_TYPES[floor:]:
+        if largest <= limit:
+            return name
+    return "BIGINT"
+
+def _decimal_places(values):
+    text = values.map(lambda v: format(v, "f").rstrip("0").rstrip("."))
+    return int(text.str.partition(".")[2].str.len().max())
 
+def infer_column_type(column, series, complete=True):
+    """Pick a MySQL type for a column from a sample of its values.
+
+    When the sample is not the whole file (`complete=False`), integer ranges
+    and VARCHAR lengths get headroom for unseen rows, and non-integer numbers
+    become DOUBLE, since a later chunk may carry more decimal places than a
+    DECIMAL sized from the sample would keep.
+    """
+    values = series.dropna()
+    if values.empty:
+        return "VARCHAR(255)"
+
+    if pd.api.types.is_bool_dtype(values):
+        return "TINYINT(1)"
+
+    if pd.api.types.is_numeric_dtype(values):
+        largest = float(values.abs().max())
+        if not complete:
+            largest *= 4
+        places = _decimal_places(values) if pd.api.types.is_float_dtype(values) else 0
+        if places == 0:
+            return _integer_type(column, largest)
+        digits = len(str(int(largest))) if largest >= 1 else 1
+        if complete and places <= 4 and digits + places <= 18:
+            return f"DECIMAL({digits + places},{places})"
+        return "DOUBLE"
+
+    text = values.astype(str)
+    if text.str.match(ISO_DATE).all():
+        return "DATE"
+    if text.str.match(ISO_DATETIME).all():
+        return "DATETIME"
+
+    longest = int(text.str.len().max()) * (1.25 if complete else 2)
+    if longest > MAX_VARCHAR:
+        return "TEXT"
+    size = 16
+    while size < longest:
+        size *= 2
+    return f"VARCHAR({min(size, MAX_VARCHAR)})"
+
+def column_definitions(sample_df, complete=True):
+    return [
+        f"`{col}` {infer_column_type(col, sample_df[col], complete)}"
+        for col in sample_df.columns
+    ]
+
+def table_ddl(table_name, sample_df, complete=True):
+    columns = ",\n    ".join(column_definitions(sample_df, complete))
+    return f"CREATE TABLE `{table_name}` (\n    {columns}\n)"
+
+# The DDL the loader would run for a CSV, for review before loading
+def plan_table_ddl(csv_file, sample_rows=None):
+    sample_rows = sample_rows or CHUNK_SIZE
+    raw = pd.read_csv(csv_file, nrows=sample_rows)
+    # measured before prepare_frame drops blank lines, which would make a
+    # full sample look like the whole file
+    complete = len(raw) < sample_rows
+    return table_ddl(table_name_for(csv_file), prepare_frame(raw, csv_file), complete=complete)
+
+def create_table(table_name, sample_df, db_name, complete=True):
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
     cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
-    cursor.execute(f"CREATE TABLE `{table_name}` ({', '.join(column_definitions)})")
+    cursor.execute(table_ddl(table_name, sample_df, complete))
     conn.commit()
     cursor.close()
     conn.close()
+    invalidate_schema(db_name)
     print(f"Table `{table_name}` created successfully.")
     return table_name
 
+def create_table_from_csv(csv_file, db_name, sample_rows=None):
+    sample_rows = sample_rows or CHUNK_SIZE
+    raw = pd.read_csv(csv_file, nrows=sample_rows)
+    complete = len(raw) < sample_rows
+    return create_table(table_name_for(csv_file), prepare_frame(raw, csv_file), db_name, complete=complete)
+
 # --- Data Insertion ---
 
-def insert_csv_data(csv_file, table_name, db_name):
-    df = pd.read_csv(csv_file)
-    df = df.loc[:, df.columns.notna()]
-    df.columns = clean_column_names(df.columns)
+# Rows sent per executemany() round-trip; override with INSERT_BATCH_SIZE in .env
+BATCH_SIZE = int(os.getenv("INSERT_BATCH_SIZE", "5000"))
 
+def fill_missing(df):
+    df = df.copy()
     for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
+        if pd.api.types.is_numeric_dtype(df[col]) and col not in NULLABLE_COLUMNS:
             df[col] = df[col].fillna(0)
-        else:
-            df[col] = df[col].where(pd.notna(df[col]), None)
-
-    conn = connect_mysql(db_name)
-    cursor = conn.cursor()
+    # astype(object) hands the connector plain Python ints/floats instead of numpy scalars
+    return df.astype(object).where(pd.notna(df), None)
 
+# inserts one DataFrame chunk; `offset` is the chunk's first row number in the file
+def insert_frame(conn, cursor, table_name, df, offset=0, batch_size=None):
+    batch_size = batch_size or BATCH_SIZE
     columns = ", ".join([f"`{col}`" for col in df.columns])
     placeholders = ", ".join(["%s"] * len(df.columns))
     insert_query = f"INSERT INTO `{table_name}` ({columns}) VALUES ({placeholders})"
 
+    rows = fill_missing(df).values.tolist()
     success_count = 0
     fail_count = 0
 
+    # executemany() rewrites each batch into one multi-row INSERT, so a batch
+    # either lands or fails as a unit; failures are reported by row range
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            cursor.executemany(insert_query, batch)
+            conn.commit()
+            success_count += len(batch)
+        except mysql.connector.Error as err:
+            conn.rollback()
+            first = offset + start + 1
+            print(f"⚠️ Rows {first}-{first + len(batch) - 1} failed to insert: {err}")
+            fail_count += len(batch)
+    return success_count, fail_count
+
+def insert_chunks(chunks, table_name, db_name, batch_size=None):
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+
+    success_count = 0
+    fail_count = 0
+    offset = 0
+
     try:
-        for idx, row in df.iterrows():
-            try:
-                cursor.execute(insert_query, tuple(row))
-                success_count += 1
-            except mysql.connector.Error as err:
-                print(f"⚠️ Row {idx + 1} failed to insert: {err}")
-                fail_count += 1
-        conn.commit()
+        for chunk in chunks:
+            ok, failed = insert_frame(conn, cursor, table_name, chunk, offset, batch_size)
+            success_count += ok
+            fail_count += failed
+            offset += len(chunk)
         print(f"✅ Inserted {success_count} rows into `{table_name}`. Failed inserts: {fail_count}")
     finally:
         cursor.close()
         conn.close()
+    return success_count, fail_count
 
-def get_schema(db_name):
-    conn = connect_mysql(db_name)
+def insert_csv_data(csv_file, table_name, db_name, batch_size=None, use_load_data=False, chunk_size=None):
+    if use_load_data:
+        return load_csv_data_infile(csv_file, table_name, db_name)
+    return insert_chunks(read_csv_chunks(csv_file, chunk_size), table_name, db_name, batch_size)
+
+# Streaming pipeline: parses the CSV once, creates the table from the first
+# chunk and pipes every chunk straight into batched inserts. With
+# use_load_data the rows go through LOAD DATA LOCAL INFILE instead.
+def load_csv(csv_file, db_name, batch_size=None, chunk_size=None, use_load_data=False):
+    chunk_size = chunk_size or CHUNK_SIZE
+    chunks = read_csv_chunks_counted(csv_file, chunk_size)
+    first_rows, first = next(chunks, (0, None))
+    table_name = table_name_for(csv_file)
+    if first is None:
+        print(f"⚠️ {csv_file} has no rows; skipping.")
+        return table_name, 0, 0
+
+    # a short first chunk (counted before blank lines are dropped) means the
+    # sample is the whole file
+    create_table(table_name, first, db_name, complete=first_rows < chunk_size)
+    if use_load_data:
+        chunks.close()
+        success_count, fail_count = load_csv_data_infile(csv_file, table_name, db_name)
+        return table_name, success_count, fail_count
+
+    def all_chunks():
+        yield first
+        for _, chunk in chunks:
+            yield chunk
+
+    success_count, fail_count = insert_chunks(all_chunks(), table_name, db_name, batch_size)
+    return table_name, success_count, fail_count
+
+# Server-side bulk path; requires local_infile=ON on the MySQL server
+def load_csv_data_infile(csv_file, table_name, db_name):
+    # LOAD DATA maps CSV fields only; derived columns are filled afterwards
+    header = prepare_frame(pd.read_csv(csv_file, nrows=0), csv_file, derive=False)
+    columns = ", ".join([f"`{col}`" for col in header.columns])
+    with open(csv_file, "rb") as f:
+        line_end = "\\r\\n" if f.readline().endswith(b"\r\n") else "\\n"
+
+    conn = connect_mysql(db_name, allow_local_infile=True)
     cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table_name}` "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '{line_end}' IGNORE 1 LINES "
+            f"({columns})",
+            (os.path.abspath(csv_file),)
+        )
+        loaded = cursor.rowcount
+        # LOCAL turns data errors into warnings: the rows load with coerced
+        # or truncated values, so report them as failures
+        warnings = cursor.warning_count
+        if warnings:
+            cursor.execute("SHOW WARNINGS LIMIT 5")
+            for level, code, message in cursor.fetchall():
+                print(f"⚠️ {table_name}: {level} {code}: {message}")
+        if table_name in DERIVED_COLUMN_SQL:
+            cursor.execute(DERIVED_COLUMN_SQL[table_name])
+        conn.commit()
+        print(f"✅ Loaded {loaded} rows into `{table_name}` via LOAD DATA. Warnings: {warnings}")
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(f"⚠️ LOAD DATA into `{table_name}` failed: {err}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return loaded, warnings
 
-    cursor.execute("SHOW TABLES")
-    tables = [table[0] for table in cursor.fetchall()]
+# --- Schema Introspection ---
 
+# Seconds a cached schema is trusted before its version is re-checked
+SCHEMA_CHECK_INTERVAL = float(os.getenv("SCHEMA_CHECK_INTERVAL", "30"))
+
+_schema_cache = {}
+_schema_lock = threading.Lock()
+
+# Table count, newest CREATE/ALTER time and column count change on any DDL
+def _schema_version(cursor, db_name):
+    cursor.execute("""
+        SELECT COUNT(*), MAX(create_time),
+               (SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = %s)
+        FROM information_schema.tables
+        WHERE table_schema = %s
+    """, (db_name, db_name))
+    return tuple(str(value) for value in cursor.fetchone())
+
+def _load_schema(cursor, db_name):
+    cursor.execute("""
+        SELECT table_name, column_name, column_type, column_key
+        FROM information_schema.columns
+        WHERE table_schema = %s
+        ORDER BY table_name, ordinal_position
+    """, (db_name,))
+    tables = {}
+    for table, column, column_type, column_key in cursor.fetchall():
+        tables.setdefault(table, []).append((column, column_type, column_key))
+    return tables
+
+def format_schema(tables):
     schema_info = []
-    for table in tables:
-        cursor.execute(f"DESCRIBE `{table}`")
-        columns = cursor.fetchall()
-        while cursor.nextset():  # Clear any remaining result sets
-            pass
-        schema_info.append(f"Table: `{table}`, Columns: {[col[0] for col in columns]}")
+    for table, columns in tables.items():
+        described = [" ".join(part for part in column if part) for column in columns]
+        schema_info.append(f"Table: `{table}`, Columns: {described}")
+    return "\n".join(schema_info)
+
+def _cached_schema(db_name):
+    now = time.monotonic()
+    with _schema_lock:
+        entry = _schema_cache.get(db_name)
+        if entry and now - entry["checked"] < SCHEMA_CHECK_INTERVAL:
+            return entry
+
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+    try:
+        version = _schema_version(cursor, db_name)
+        if entry and entry["version"] == version:
+            entry["checked"] = now
+            return entry
+        tables = _load_schema(cursor, db_name)
+    finally:
+        cursor.close()
+        conn.close()
+
+    text = format_schema(tables)
+    entry = {
+        "version": version,
+        "checked": now,
+        "tables": tables,
+        "text": text,
+        "fingerprint": hashlib.sha256(text.encode()).hexdigest()[:16],
+    }
+    with _schema_lock:
+        _schema_cache[db_name] = entry
+    return entry
 
+# Drops cached schemas so the next lookup re-reads information_schema; the
+# loaders call this after DDL
+def invalidate_schema(db_name=None):
+    with _schema_lock:
+        if db_name is None:
+            _schema_cache.clear()
+        else:
+            _schema_cache.pop(db_name, None)
+
+def get_schema(db_name):
+    return _cached_schema(db_name)["text"]
+
+# {table: [(column, column_type, column_key), ...]}
+def get_schema_columns(db_name):
+    return _cached_schema(db_name)["tables"]
+
+# Short hash of the schema description, for keying anything built from it
+def get_schema_fingerprint(db_name):
+    return _cached_schema(db_name)["fingerprint"]
+
+# --- Parallel loading ---
+
+# Worker threads for run_load_plan; override with LOAD_WORKERS in .env
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "4"))
+
+def drop_movie_genres(db_name):
+    # movie_genres holds an FK to movies_clean, so it must go before movies_clean is recreated
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS movie_genres")
+    conn.commit()
     cursor.close()
     conn.close()
-    return "\n".join(schema_info)
+    invalidate_schema(db_name)
+    return 0
+
+# Runs a dependency graph of load tasks on a thread pool. `tasks` maps a task
+# name to (callable, [names it depends on]); each callable returns the number
+# of rows it loaded. Tasks whose dependencies failed are skipped.
+def run_load_plan(tasks, max_workers=None):
+    stats = {}
+    done, failed = set(), set()
+    pending = dict(tasks)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or LOAD_WORKERS) as pool:
+        while pending or running:
+            for name, (func, deps) in list(pending.items()):
+                if any(dep in failed for dep in deps):
+                    print(f"⚠️ Skipping {name}: a dependency failed.")
+                    failed.add(name)
+                    del pending[name]
+                elif all(dep in done for dep in deps):
+                    running[pool.submit(_timed_task, func)] = name
+                    del pending[name]
+
+            if not running:
+                missing = {name: deps for name, (_, deps) in pending.items()}
+                raise ValueError(f"Unresolvable load dependencies: {missing}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    stats[name] = future.result()
+                    done.add(name)
+                except Exception as e:
+                    print(f"⚠️ Load task {name} failed: {e}")
+                    failed.add(name)
+
+    print("\nLoad summary:")
+    for name, (rows, elapsed) in stats.items():
+        rate = rows / elapsed if elapsed > 0 else 0
+        print(f"  {name:<40} {rows:>10} rows  {elapsed:8.2f}s  {rate:>12,.0f} rows/s")
+    return stats
+
+def _timed_task(func):
+    started = time.perf_counter()
+    rows = func() or 0
+    return rows, time.perf_counter() - started
+
+def load_task(csv_file, db_name, use_load_data=False):
+    from index_advisor import apply_known_keys
+
+    def run():
+        table_name, success_count, _ = load_csv(csv_file, db_name, use_load_data=use_load_data)
+        apply_known_keys(db_name, table_name)
+        return success_count
+    return run
 
 # --- Main execution block ---
 
 if __name__ == "__main__":
+    from GenreSetup import create_movie_genres_table, populate_movie_genres
+
+    sars_db = os.getenv("DB_SARS")
+    movielens_db = os.getenv("DB_MOVIELENS")
+
     # SARS Files
     sars_files = [
         "C:\\Users\\alpha\\OneDrive\\Desktop\\DSCI 551\\Python Projs\\Project_Stuff\\DSCI 551 Project\\Sars\\sars_2003_complete_dataset_clean.csv",
         "C:\\Users\\alpha\\OneDrive\\Desktop\\DSCI 551\\Python Projs\\Project_Stuff\\DSCI 551 Project\\Sars\\summary_data_clean.csv"
     ]
-    for file in sars_files:
-        table = create_table_from_csv(file, os.getenv("DB_SARS"))
-        insert_csv_data(file, table, os.getenv("DB_SARS"))
 
     # MovieLens Files
     movie_files = [
@@ -155,14 +512,43 @@ if __name__ == "__main__":
         "C:\\Users\\alpha\\OneDrive\\Desktop\\DSCI 551\\Python Projs\\Project_Stuff\\DSCI 551 Project\\ml-latest-small\\links_clean.csv"
     ]
 
-    # Drop movie_genres first to avoid FK constraint errors
-    conn = connect_mysql(os.getenv("DB_MOVIELENS"))
-    cursor = conn.cursor()
-    cursor.execute("DROP TABLE IF EXISTS movie_genres")
-    conn.commit()
-    cursor.close()
-    conn.close()
+    parser = argparse.ArgumentParser(description="Load the SARS and MovieLens CSVs into MySQL")
+    parser.add_argument(
+        "--plan", action="store_true",
+        help="Print the CREATE TABLE statements inferred from each CSV and exit"
+    )
+    parser.add_argument(
+        "--load-data", action="store_true",
+        help="Bulk-load rows with LOAD DATA LOCAL INFILE (needs local_infile=ON on the server)"
+    )
+    args = parser.parse_args()
+
+    if args.plan:
+        for file in sars_files + movie_files:
+            print(plan_table_ddl(file) + ";\n")
+        raise SystemExit(0)
 
+    tasks = {"drop movie_genres": (lambda: drop_movie_genres(movielens_db), [])}
+    for file in sars_files:
+        tasks[table_name_for(file)] = (load_task(file, sars_db, args.load_data), [])
     for file in movie_files:
-        table = create_table_from_csv(file, os.getenv("DB_MOVIELENS"))
-        insert_csv_data(file, table, os.getenv("DB_MOVIELENS"))
+        # Drop movie_genres first to avoid FK constraint errors
+        tasks[table_name_for(file)] = (load_task(file, movielens_db, args.load_data), ["drop movie_genres"])
+
+    def build_movie_genres():
+        from index_advisor import apply_known_keys
+
+        create_movie_genres_table()
+        inserted = populate_movie_genres()
+        apply_known_keys(movielens_db, "movie_genres")
+        return inserted
+
+    tasks["movie_genres"] = (build_movie_genres, ["movies_clean"])
+
+    def build_rollups():
+        from AggregateSetup import rebuild_rollups
+        return rebuild_rollups()
+
+    tasks["rating rollups"] = (build_rollups, ["ratings", "movie_genres"])
+
+    run_load_plan(tasks)
@@ -0,0 +1,75 @@
+import argparse
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from service import answer
+from translation_cache import normalize_question
+
+
+def read_questions(path, default_backend="sql"):
+    """Read questions from a .jsonl file ({"question", "backend"}) or a CSV with a question column."""
+    questions = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            question = (row.get("question") or "").strip()
+            if question:
+                questions.append((question, (row.get("backend") or default_backend).strip().lower()))
+    return questions
+
+
+def _answer_safely(question, backend, max_rows=None):
+    started = time.perf_counter()
+    try:
+        return answer(question, backend, max_rows)
+    except Exception as e:
+        return {"backend": backend, "error": str(e), "elapsed_ms": round(1000 * (time.perf_counter() - started), 1)}
+
+
+def run_batch(questions, output_path, concurrency=4, max_rows=None):
+    """Answer (question, backend) pairs concurrently and write one JSON line per input question.
+
+    Identical questions (after normalization) are translated and executed once.
+    """
+    unique = {}
+    for question, backend in questions:
+        unique.setdefault((backend, normalize_question(question)), question)
+    print(f"{len(questions)} questions, {len(unique)} unique.")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {key: pool.submit(_answer_safely, question, key[0], max_rows) for key, question in unique.items()}
+        results = {key: future.result() for key, future in futures.items()}
+
+    failed = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for question, backend in questions:
+            result = results[(backend, normalize_question(question))]
+            failed += "error" in result
+            out.write(json.dumps({"question": question, **result}, default=str) + "\n")
+
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {len(questions)} results to {output_path} in {elapsed:.1f}s ({failed} failed).")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Translate and execute a file of natural-language questions"
+    )
+    parser.add_argument("input", help="JSONL or CSV file with a 'question' (and optional 'backend') field")
+    parser.add_argument("--output", "-o", default="results.jsonl", help="Where to write JSONL results")
+    parser.add_argument("--backend", "-b", default="sql", choices=["sql", "mongo"],
+                        help="Backend for rows that do not name one")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="Questions answered at once")
+    parser.add_argument("--max-rows", type=int, default=None, help="Rows kept per question (0 = no cap)")
+    args = parser.parse_args()
+
+    run_batch(read_questions(args.input, args.backend), args.output, args.concurrency, args.max_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+from semantic_cache import NUMBER_WORDS
+from translation_cache import normalize_question
+
+# Load environment variables
+load_dotenv(".env")
+
+# Seconds before the genre/country vocabularies are re-read from the databases
+VOCABULARY_TTL = float(os.getenv("FAST_PATH_VOCABULARY_TTL", "3600"))
+
+_LEAD_IN = re.compile(
+    r"^(?:please |can you |could you |show me |show |list |give me |find |get |tell me |what are |what is |which are )+"
+)
+_NUMBER = r"(?P<n>\d+|" + "|".join(NUMBER_WORDS) + r")"
+_FILMS = r"(?:movies|movie|films|film)"
+
+_vocab = {}
+_vocab_lock = threading.Lock()
+
+
+def _quote(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def _number(text, default=10):
+    if not text:
+        return default
+    return int(NUMBER_WORDS.get(text, text))
+
+
+def _load_vocabulary(name, loader):
+    now = time.monotonic()
+    with _vocab_lock:
+        cached = _vocab.get(name)
+        if cached and now - cached[0] < VOCABULARY_TTL:
+            return cached[1]
+    try:
+        values = sorted({str(v) for v in loader() if v}, key=len, reverse=True)
+    except Exception as e:
+        print(f"⚠️ Fast path vocabulary '{name}' unavailable: {e}")
+        values = []
+    with _vocab_lock:
+        _vocab[name] = (now, values)
+    return values
+
+
+def _distinct_sql(db_env, sql_query):
+    def load():
+        from mysql_client import connect_mysql
+        conn = connect_mysql(os.getenv(db_env))
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql_query)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+    return load
+
+
+def sql_genres():
+    return _load_vocabulary("sql_genres", _distinct_sql("DB_MOVIELENS", "SELECT DISTINCT `genre` FROM `movie_genres`"))
+
+
+def sql_countries():
+    return _load_vocabulary("sql_countries", _distinct_sql(
+        "DB_SARS", "SELECT DISTINCT `country` FROM `sars_2003_complete_dataset_clean`"
+    ))
+
+
+def mongo_genres():
+    def load():
+        from mongo_client import get_database
+        return get_database().movies.distinct("genres")
+    return _load_vocabulary("mongo_genres", load)
+
+
+def _alternation(values):
+    return "(?P<v>" + "|".join(re.escape(v.lower()) for v in values) + ")" if values else None
+
+
+def _canonical(values, matched):
+    return next(v for v in values if v.lower() == matched)
+
+
+def _strip(question):
+    return _LEAD_IN.sub("", normalize_question(question))
+
+
+# --- SQL templates ---
+
+def match_sql(question):
+    """Return (sql, db_env) for a templated question, or None.
+
+    `question` should already be through normalize_query_input so country
+    aliases match the stored names.
+    """
+    q = _strip(question)
+
+    if re.fullmatch(r"(?:which|what) genre has the (?:highest|best) average rating", q):
+        return ("SELECT `genre`, `avg_rating` FROM `genre_rating_stats` "
+                "WHERE `avg_rating` = (SELECT MAX(`avg_rating`) FROM `genre_rating_stats`)", "DB_MOVIELENS")
+
+    genres = sql_genres()
+    genre = _alternation(genres)
+    if genre:
+        m = re.fullmatch(rf"(?:the )?top {_NUMBER} {genre} {_FILMS}", q)
+        if m:
+            return (
+                "SELECT m.`title`, s.`avg_rating` FROM `movie_rating_stats` s "
+                "JOIN `movie_genres` g ON g.`movieid` = s.`movieid` "
+                "JOIN `movies_clean` m ON m.`movieid` = s.`movieid` "
+                f"WHERE g.`genre` = {_quote(_canonical(genres, m.group('v')))} "
+                f"ORDER BY s.`avg_rating` DESC, m.`title` LIMIT {_number(m.group('n'))}",
+                "DB_MOVIELENS"
+            )
+        m = re.fullmatch(rf"(?:the )?average rating (?:for|of) (?:the )?{genre}(?: genre)?(?: {_FILMS})?", q)
+        if m:
+            return ("SELECT `genre`, `avg_rating` FROM `genre_rating_stats` "
+                    f"WHERE `genre` = {_quote(_canonical(genres, m.group('v')))}", "DB_MOVIELENS")
+
+    m = re.fullmatch(rf"{_FILMS} (?:released |that came out )?in (?P<y>\d{{4}})", q)
+    if m:
+        return ("SELECT `title` FROM `movies_clean` "
+                f"WHERE `release_year` = {int(m.group('y'))} ORDER BY `title`", "DB_MOVIELENS")
+
+    m = re.fullmatch(rf"(?:which |what )?(?:the )?(?:top {_NUMBER} )?countries (?:had|have|with) the most (?:sars )?deaths", q)
+    if m:
+        # the daily table is cumulative, so a country's total is its maximum
+        return ("SELECT `country`, MAX(`number_of_deaths`) AS `total_deaths` "
+                "FROM `sars_2003_complete_dataset_clean` GROUP BY `country` "
+                f"ORDER BY `total_deaths` DESC LIMIT {_number(m.group('n'))}", "DB_SARS")
+
+    countries = sql_countries()
+    country = _alternation(countries)
+    if country:
+        m = re.fullmatch(rf"how many (?:sars )?(?P<what>cases|deaths) (?:were there )?in {country}", q)
+        if m:
+            column = "cumulative_number_of_cases" if m.group("what") == "cases" else "number_of_deaths"
+            return (f"SELECT `country`, MAX(`{column}`) AS `total_{m.group('what')}` "
+                    "FROM `sars_2003_complete_dataset_clean` "
+                    f"WHERE `country` = {_quote(_canonical(countries, m.group('v')))} GROUP BY `country`",
+                    "DB_SARS")
+    return None
+
+
+# --- Mongo templates ---
+
+def match_mongo(request):
+    """Return a PyMongo expression for a templated request, or None."""
+    q = _strip(request)
+    projection = "{'_id': 0, 'title': 1, 'year': 1}"
+
+    m = re.fullmatch(rf"{_FILMS} (?:released |that came out )?in (?P<y>\d{{4}})", q)
+    if m:
+        return f"db.movies.find({{'year': {int(m.group('y'))}}}, {projection})"
+
+    genres = mongo_genres()
+    genre = _alternation(genres)
+    if genre:
+        m = re.fullmatch(rf"(?:the )?top {_NUMBER} {genre} {_FILMS}", q)
+        if m:
+            value = _canonical(genres, m.group("v"))
+            return (f"db.movies.find({{'genres': {value!r}, 'imdb.rating': {{'$type': 'number'}}}}, "
+                    "{'_id': 0, 'title': 1, 'year': 1, 'imdb.rating': 1})"
+                    f".sort('imdb.rating', -1).limit({_number(m.group('n'))})")
+    return None
@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+import mysql.connector
+from dotenv import load_dotenv
+from mysql_client import connect_mysql
+from TableSetup import get_schema_columns, invalidate_schema
+
+# Load environment variables
+load_dotenv(".env")
+
+# Every generated SQL query is appended here (one JSON object per line)
+WORKLOAD_LOG = os.getenv("SQL_WORKLOAD_LOG", ".chatdb_workload.jsonl")
+# Prefix length used when indexing TEXT/BLOB columns
+TEXT_PREFIX_LENGTH = 64
+
+# Primary keys of the loaded CSV tables (MovieLens guarantees one rating per user/movie)
+KNOWN_PRIMARY_KEYS = {
+    "movies_clean": ["movieid"],
+    "links_clean": ["movieid"],
+    "ratings": ["userid", "movieid"],
+}
+
+# Secondary indexes for the joins and group-bys the prompts ask for
+KNOWN_INDEXES = {
+    "movies_clean": [["release_year"]],
+    "ratings": [["movieid"]],
+    "movie_genres": [["movieid"], ["genre"]],
+    "sars_2003_complete_dataset_clean": [["country"], ["date"]],
+    "summary_data_clean": [["countryregion"]],
+}
+
+_SQL_KEYWORDS = {
+    "on", "where", "join", "left", "right", "inner", "outer", "cross", "natural", "group",
+    "order", "limit", "having", "using", "union", "as", "and", "or", "not", "in", "is",
+    "null", "like", "between", "by", "asc", "desc", "select", "from", "distinct", "straight_join",
+}
+# the alias may not be a keyword, or "FROM `ratings` JOIN ..." would alias ratings as JOIN
+_TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?(?!(?:" + "|".join(sorted(_SQL_KEYWORDS)) + r")\b)`?(\w+)`?)?",
+    re.IGNORECASE
+)
+_USING = re.compile(r"\bUSING\s*\(([^)]*)\)", re.IGNORECASE)
+_CLAUSES = re.compile(
+    r"\b(?:ON|WHERE|GROUP\s+BY|ORDER\s+BY)\b(.*?)"
+    r"(?=\b(?:JOIN|LEFT|RIGHT|INNER|WHERE|GROUP|HAVING|ORDER|LIMIT|UNION)\b|$)",
+    re.IGNORECASE | re.DOTALL
+)
+_COLUMN_REF = re.compile(r"(?:`?(\w+)`?\s*\.\s*)?`?([A-Za-z_]\w*)`?")
+
+
+# --- Workload logging ---
+
+def log_query(db_name, sql_query):
+    """Append a generated query to the workload log."""
+    try:
+        with open(WORKLOAD_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"db": db_name, "sql": sql_query, "ts": time.time()}) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not log query for the index advisor: {e}")
+
+
+def read_workload(db_name, path=None):
+    path = path or WORKLOAD_LOG
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = (json.loads(line) for line in f if line.strip())
+        return [entry["sql"] for entry in entries if entry.get("db") == db_name]
+
+
+# --- Candidate derivation ---
+
+def referenced_columns(sql_query, tables):
+    """Return the (table, column) pairs a query joins, filters, groups or sorts on.
+
+    `tables` is {table: [(column, column_type, column_key), ...]}; unqualified
+    columns are attributed to the one table in the query that has them.
+    """
+    sql_query = re.sub(r"'[^']*'|\"[^\"]*\"", "''", sql_query)
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql_query):
+        if table in tables:
+            aliases[table] = table
+            if alias:
+                aliases[alias] = table
+    in_query = set(aliases.values())
+
+    found = set()
+    # JOIN ... USING (col) joins on col in every table that has it
+    for using in _USING.findall(sql_query):
+        for column in re.findall(r"\w+", using):
+            found.update((t, column) for t in in_query if column in {c[0] for c in tables[t]})
+    for clause in _CLAUSES.findall(sql_query):
+        for qualifier, column in _COLUMN_REF.findall(clause):
+            if qualifier:
+                table = aliases.get(qualifier)
+                owners = [table] if table else []
+            else:
+                owners = [t for t in in_query if column in {c[0] for c in tables[t]}]
+            if len(owners) == 1 and column in {c[0] for c in tables[owners[0]]}:
+                found.add((owners[0], column))
+    return found
+
+
+def _indexed_prefixes(cursor, db_name):
+    cursor.execute("""
+        SELECT table_name, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = %s AND seq_in_index = 1
+    """, (db_name,))
+    return set(cursor.fetchall())
+
+
+def advise(db_name, min_count=2, workload=None):
+    """Rank (table, column, uses) index candidates from the logged workload.
+
+    Columns that already lead an index are skipped.
+    """
+    tables = get_schema_columns(db_name)
+    counts = Counter()
+    for sql_query in (workload if workload is not None else read_workload(db_name)):
+        counts.update(referenced_columns(sql_query, tables))
+
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+    try:
+        indexed = _indexed_prefixes(cursor, db_name)
+    finally:
+        cursor.close()
+        conn.close()
+
+    return [
+        (table, column, uses) for (table, column), uses in counts.most_common()
+        if uses >= min_count and (table, column) not in indexed
+    ]
+
+
+# --- DDL ---
+
+def _column_types(tables, table):
+    return {column: column_type for column, column_type, _ in tables.get(table, [])}
+
+
+def _index_part(column, column_type):
+    if re.search(r"text|blob", column_type or "", re.IGNORECASE):
+        return f"`{column}`({TEXT_PREFIX_LENGTH})"
+    return f"`{column}`"
+
+
+def index_ddl(table, columns, tables):
+    types = _column_types(tables, table)
+    name = f"idx_{table}_{'_'.join(columns)}"[:64]
+    parts = ", ".join(_index_part(column, types.get(column)) for column in columns)
+    return f"CREATE INDEX `{name}` ON `{table}` ({parts})"
+
+
+def _run_ddl(db_name, statements):
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+    applied = 0
+    try:
+        for statement in statements:
+            try:
+                cursor.execute(statement)
+                applied += 1
+                print(f"✅ {statement}")
+            except mysql.connector.Error as err:
+                print(f"⚠️ {statement} failed: {err}")
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    if applied:
+        invalidate_schema(db_name)
+    return applied
+
+
+def apply_indexes(db_name, candidates):
+    """Create single-column indexes for advise() candidates."""
+    tables = get_schema_columns(db_name)
+    return _run_ddl(db_name, [index_ddl(table, [column], tables) for table, column, _ in candidates])
+
+
+def apply_known_keys(db_name, table=None):
+    """Add the known primary keys and join/group-by indexes that are missing.
+
+    Called by the loader after a table is (re)created; `table` limits the
+    work to that table.
+    """
+    tables = get_schema_columns(db_name)
+    conn = connect_mysql(db_name)
+    cursor = conn.cursor()
+    try:
+        indexed = _indexed_prefixes(cursor, db_name)
+    finally:
+        cursor.close()
+        conn.close()
+
+    statements = []
+    for name in ([table] if table else list(tables)):
+        if name not in tables:
+            continue
+        columns = _column_types(tables, name)
+        primary = KNOWN_PRIMARY_KEYS.get(name)
+        has_primary = any(key == "PRI" for _, _, key in tables[name])
+        if primary and not has_primary and all(c in columns for c in primary):
+            keys = ", ".join(_index_part(c, columns[c]) for c in primary)
+            statements.append(f"ALTER TABLE `{name}` ADD PRIMARY KEY ({keys})")
+            indexed.add((name, primary[0]))
+        for index in KNOWN_INDEXES.get(name, []):
+            if all(c in columns for c in index) and (name, index[0]) not in indexed:
+                statements.append(index_ddl(name, index, tables))
+    return _run_ddl(db_name, statements)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suggest (and optionally create) indexes from the SQL workload log")
+    parser.add_argument("--db", required=True, help="Database to advise on (e.g. movielens_db)")
+    parser.add_argument("--min-count", type=int, default=2, help="Minimum uses before a column is suggested")
+    parser.add_argument("--apply", action="store_true", help="Create the suggested indexes")
+    args = parser.parse_args()
+
+    candidates = advise(args.db, args.min_count)
+    schema = get_schema_columns(args.db)
+    for table, column, uses in candidates:
+        print(f"{uses:>5} uses  {index_ddl(table, [column], schema)};")
+    if not candidates:
+        print("No index candidates.")
+    elif args.apply:
+        apply_indexes(args.db, candidates)
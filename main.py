@@ -1,21 +1,27 @@
 import os
 
 def run_sql_interface():
-    from SQL_API.py import execute_sql_query
+    from SQL_API import execute_sql_query, fetch_next_page
     print("\nYou are now connected to the SQL interface.")
     while True:
         user_input = input("Enter your natural language query (or type 'back' to return): ")
         if user_input.lower() in ("back", "exit", "quit"):
             break
+        if user_input.strip().lower() == "more":
+            print("\nResult:\n", fetch_next_page())
+            continue
         result = execute_sql_query(user_input)
         print("\nResult:\n", result)
 
 def run_mongo_interface():
-    from mongo_client.py import get_database
-    from translator.py import translate_nl_to_code
+    from mongo_client import get_database
+    from translator import translate_nl_to_code
+    from result_stream import write_mongo_result, summarize
+    from query_guard import MongoPager
 
     print("\nYou are now connected to the MongoDB interface.")
     db = get_database()
+    pager = None
 
     while True:
         user_input = input("Enter your natural language query (or type 'back' to return): ")
@@ -23,14 +29,20 @@ def run_mongo_interface():
             break
 
         try:
-            code = translate_nl_to_code(user_input)
-            print("\nGenerated code snippet:\n", code)
-            local_vars = {'db': db}
-            result = eval(code, {'__builtins__': {}}, local_vars)
-
-            if hasattr(result, '__iter__') and not isinstance(result, (str, bytes, dict)):
-                result = list(result)
-            print("\nResult:\n", result)
+            if user_input.strip().lower() == "more":
+                if pager is None or pager.done:
+                    print("No more rows.")
+                    continue
+            else:
+                code = translate_nl_to_code(user_input)
+                print("\nGenerated code snippet:\n", code)
+                pager = MongoPager(code)
+            result = pager.next_page(db)
+
+            print("\nResult:")
+            count, more = write_mongo_result(result, max_rows=pager.page_size)
+            pager.record(count, more)
+            print(summarize(count, more) + (" Type 'more' for the next page." if not pager.done else ""))
         except Exception as e:
             print(f"Error executing MongoDB code: {e}")
 
@@ -1,8 +1,9 @@
 import argparse
-import json
 import builtins
 from translator import translate_nl_to_code
 from mongo_client import get_database
+from result_stream import write_mongo_result, summarize
+from query_guard import execute_mongo_code
 
 
 def main():
@@ -13,6 +14,14 @@ def main():
         "--query", "-q", required=True,
         help="Your natural-language MongoDB request"
     )
+    parser.add_argument(
+        "--max-rows", type=int, default=None,
+        help="Stop after this many documents (0 = no cap)"
+    )
+    parser.add_argument(
+        "--output", "-o",
+        help="Write results (one JSON document per line) to this file instead of stdout"
+    )
     args = parser.parse_args()
 
     # 1) Get the database
@@ -22,25 +31,25 @@ def main():
     code = translate_nl_to_code(args.query)
     print("\nGenerated code snippet:\n", code)
 
-    # 3) Execute the code safely
-    local_vars = {'db': db}
+    # 3) Execute the code safely, with a row budget on find/aggregate
     try:
-        result = eval(code, {'__builtins__': {}}, local_vars)
+        result = execute_mongo_code(code, db, args.max_rows)
     except Exception as e:
         print(f"Error executing MongoDB code: {e}")
         return
 
-    # 4) Print results
-    # If it's a cursor, convert to list
-    if hasattr(result, '__iter__') and not isinstance(result, (str, bytes, dict)):
-        try:
-            output = list(result)
-        except Exception:
-            output = result
-    else:
-        output = result
-
-    print("\nQuery results:", json.dumps(output, default=str, indent=2))
+    # 4) Stream results, one JSON document per line
+    try:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as out:
+                count, more = write_mongo_result(result, out, args.max_rows)
+            print(f"\nWrote {summarize(count, more)} to {args.output}")
+        else:
+            print("\nQuery results:")
+            count, more = write_mongo_result(result, max_rows=args.max_rows)
+            print(summarize(count, more))
+    except Exception as e:
+        print(f"Error reading MongoDB results: {e}")
 
 if __name__ == "__main__":
     main()
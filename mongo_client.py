@@ -1,17 +1,51 @@
+import atexit
+import os
+import threading
 from pymongo import MongoClient
 import certifi
 from config import MONGO_URI
 
+# Connection pool tuning; see the PyMongo MongoClient docs for semantics
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "1"))
+MONGO_MAX_IDLE_MS = int(os.getenv("MONGO_MAX_IDLE_MS", "300000"))
+
+_client = None
+_client_lock = threading.Lock()
+
 def get_mongo_client():
-    """Create and return a MongoClient using TLS and certifi CA bundle."""
-    return MongoClient(
-        MONGO_URI,
-        tls=True,
-        tlsCAFile=certifi.where()
-    )
+    """Return the process-wide MongoClient, creating it on first use.
+
+    MongoClient is thread-safe and owns its connection pool and monitor
+    threads, so one instance is shared for the life of the process.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MongoClient(
+                MONGO_URI,
+                tls=True,
+                tlsCAFile=certifi.where(),
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGO_MAX_IDLE_MS
+            )
+    return _client
+
+
+def close_mongo_client():
+    """Close the shared MongoClient (if any); registered to run at exit."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_mongo_client)
 
 
 def get_database(db_name: str = "sample_mflix"):
-    """Return the specified database from the MongoDB client."""
+    """Return the specified database from the shared MongoDB client."""
     client = get_mongo_client()
-    return client[db_name]
\ No newline at end of file
+    return client[db_name]
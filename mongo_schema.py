@@ -0,0 +1,223 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from bson import Decimal128, Int64, ObjectId
+from dotenv import load_dotenv
+from mongo_client import get_database
+
+# Load environment variables
+load_dotenv(".env")
+
+# Sampled summaries are written here, keyed by database name
+SCHEMA_CACHE_PATH = os.getenv("MONGO_SCHEMA_CACHE_PATH", ".chatdb_mongo_schema.json")
+# Seconds before a cached summary is re-sampled
+SCHEMA_TTL = float(os.getenv("MONGO_SCHEMA_TTL", str(24 * 3600)))
+# Documents drawn per collection with $sample
+SAMPLE_SIZE = int(os.getenv("MONGO_SCHEMA_SAMPLE_SIZE", "200"))
+# Levels of embedded documents described (1 = top-level fields only)
+FIELD_DEPTH = int(os.getenv("MONGO_SCHEMA_FIELD_DEPTH", "2"))
+# Share of sampled documents a field (or one of its types) needs before it
+# counts towards the schema hash; rarer ones come and go between samples
+MIN_PRESENCE = float(os.getenv("MONGO_SCHEMA_MIN_PRESENCE", "0.1"))
+# Seconds to wait before sampling again after a failure
+RETRY_AFTER = 300
+
+_summaries = {}
+_failed = {}
+_summary_lock = threading.Lock()
+
+
+# --- Sampling ---
+
+def _type_name(value):
+    if isinstance(value, ObjectId):
+        return "ObjectId"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float, Int64, Decimal128)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime.datetime):
+        return "date"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        inner = {_type_name(v) for v in value} - {"null"}
+        return f"array of {inner.pop()}s" if len(inner) == 1 else "array"
+    if value is None:
+        return "null"
+    return type(value).__name__
+
+
+def _collect_fields(doc, types, prefix="", depth=1):
+    for key, value in doc.items():
+        path = f"{prefix}{key}"
+        types[path][_type_name(value)] += 1
+        if isinstance(value, dict) and depth < FIELD_DEPTH:
+            _collect_fields(value, types, f"{path}.", depth + 1)
+
+
+def _field_order(path):
+    return (path != "_id", path)
+
+
+def _describe_index(spec):
+    if "weights" in spec:
+        return "text(" + ", ".join(sorted(spec["weights"])) + ")"
+    return " + ".join(field for field, _ in spec["key"])
+
+
+def sample_collection(collection, sample_size=None):
+    """Sample one collection.
+
+    Returns ({field: "type or type"}, {field: [types]}, [index descriptions],
+    approx count). The second dict is the stable part of the sample: fields
+    and types seen in at least MIN_PRESENCE of the documents, which is what
+    the schema hash is built from.
+    """
+    types = defaultdict(Counter)
+    sampled = 0
+    pipeline = [{"$sample": {"size": sample_size or SAMPLE_SIZE}}]
+    for doc in collection.aggregate(pipeline, allowDiskUse=True):
+        _collect_fields(doc, types)
+        sampled += 1
+
+    fields, stable = {}, {}
+    for path in sorted(types, key=_field_order):
+        seen = sorted(name for name in types[path] if name != "null") or ["null"]
+        fields[path] = " or ".join(seen)
+        common = [name for name in seen if types[path][name] >= MIN_PRESENCE * sampled]
+        if sum(types[path].values()) >= MIN_PRESENCE * sampled and common:
+            stable[path] = common
+    indexes = [_describe_index(spec) for spec in collection.index_information().values()]
+    indexes = [index for index in indexes if index != "_id"]
+    return fields, stable, indexes, collection.estimated_document_count()
+
+
+def _relationships(collections):
+    links = []
+    for name, (fields, _, _, _) in collections.items():
+        for field, field_type in fields.items():
+            m = re.fullmatch(r"(\w+?)_?id", field, re.IGNORECASE)
+            if not m or field_type != "ObjectId" or field == "_id":
+                continue
+            target = next((c for c in (m.group(1) + "s", m.group(1)) if c in collections and c != name), None)
+            if target:
+                links.append(f"- {name}.{field} → {target}._id")
+    return links
+
+
+def build_summary(db_name="sample_mflix", sample_size=None):
+    """Sample every collection; returns (summary text, schema hash).
+
+    The text is the "• collection / - field (type)" summary. The hash covers
+    only collections, indexes and the fields/types common enough to show up
+    in every sample, so re-sampling an unchanged database keeps the same
+    hash (and the translation caches keyed on it).
+    """
+    db = get_database(db_name)
+    collections = {
+        name: sample_collection(db[name], sample_size)
+        for name in sorted(db.list_collection_names()) if not name.startswith("system.")
+    }
+    if not collections:
+        # usually a misspelt database name; caching this would hide SCHEMA_INFO for a day
+        raise ValueError(f"database {db_name!r} has no collections")
+
+    lines = [f"Database: {db_name}", "", "Collections & Fields (with types)"]
+    for name, (fields, _, indexes, count) in collections.items():
+        indexed = {part.strip() for index in indexes for part in index.split("+")}
+        lines.append(f"• {name} (~{count:,} documents)")
+        for field, field_type in fields.items():
+            suffix = "  [indexed]" if field in indexed else ""
+            lines.append(f"  - {field} ({field_type}){suffix}")
+        if indexes:
+            lines.append(f"  indexes: {'; '.join(indexes)}")
+        lines.append("")
+
+    links = _relationships(collections)
+    if links:
+        lines += ["Relationships", *links]
+
+    signature = {name: [stable, indexes] for name, (_, stable, indexes, _) in collections.items()}
+    digest = hashlib.sha256(json.dumps(signature, sort_keys=True).encode()).hexdigest()[:16]
+    return "\n".join(lines) + "\n", digest
+
+
+# --- Disk cache ---
+
+def _read_cache():
+    try:
+        with open(SCHEMA_CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(entries):
+    try:
+        with open(SCHEMA_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+    except OSError as e:
+        print(f"⚠️ Could not save the MongoDB schema summary: {e}")
+
+
+def get_schema_entry(db_name="sample_mflix", refresh=False):
+    """Return {"generated", "text", "hash"} for `db_name`, re-sampling after SCHEMA_TTL.
+
+    A stale entry is returned if sampling fails (or finds no collections);
+    None if there is none.
+    """
+    now = time.time()
+    with _summary_lock:
+        entry = _summaries.get(db_name) or _read_cache().get(db_name)
+        if entry and "•" not in entry["text"]:
+            entry = None  # an empty summary cached before those counted as failures
+        if entry and "hash" not in entry:
+            entry["hash"] = schema_hash(entry["text"])
+        if entry and not refresh and now - entry["generated"] < SCHEMA_TTL:
+            _summaries[db_name] = entry
+            return entry
+        if not refresh and now - _failed.get(db_name, -RETRY_AFTER) < RETRY_AFTER:
+            return entry
+
+        try:
+            text, digest = build_summary(db_name)
+        except Exception as e:
+            print(f"⚠️ Could not sample the MongoDB schema: {e}")
+            _failed[db_name] = now
+            return entry
+
+        entry = {"generated": now, "text": text, "hash": digest}
+        _summaries[db_name] = entry
+        entries = _read_cache()
+        entries[db_name] = entry
+        _write_cache(entries)
+        return entry
+
+
+def get_schema_summary(db_name="sample_mflix", refresh=False):
+    """Return the sampled schema summary text for `db_name`, or None."""
+    entry = get_schema_entry(db_name, refresh)
+    return entry["text"] if entry else None
+
+
+def schema_hash(summary):
+    """Hash of a summary text (for SCHEMA_INFO or entries cached before hashes were stored)."""
+    stable = re.sub(r" \(~[\d,]+ documents\)", "", summary)
+    return hashlib.sha256(stable.encode()).hexdigest()[:16]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sample a MongoDB database and print its schema summary")
+    parser.add_argument("--db", default="sample_mflix", help="Database to sample")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the cached summary")
+    args = parser.parse_args()
+    print(get_schema_summary(args.db, refresh=args.refresh) or "No schema summary available.")
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+import mysql.connector
+from mysql.connector import errors, pooling
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(".env")
+
+# Connections kept per database; mysql.connector caps a pool at 32
+POOL_SIZE = min(int(os.getenv("DB_POOL_SIZE", "5")), pooling.CNX_POOL_MAXSIZE)
+# Seconds to wait for a free connection before giving up
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _connection_args(db_name):
+    return {
+        "host": os.getenv("DB_HOST"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+        "database": db_name,
+    }
+
+
+def get_pool(db_name=None):
+    """Return the shared connection pool for `db_name`, creating it on first use."""
+    db_name = db_name or os.getenv("ACTIVE_DB")
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"chatdb_{db_name}",
+                pool_size=POOL_SIZE,
+                pool_reset_session=True,
+                **_connection_args(db_name)
+            )
+            _pools[db_name] = pool
+    return pool
+
+
+def get_connection(db_name=None, timeout=None):
+    """Check a healthy connection out of the pool for `db_name`.
+
+    Waits up to `timeout` seconds (DB_POOL_TIMEOUT by default) when every
+    pooled connection is busy. Calling close() on the returned connection
+    hands it back to the pool instead of tearing it down.
+    """
+    pool = get_pool(db_name)
+    deadline = time.monotonic() + (POOL_TIMEOUT if timeout is None else timeout)
+    while True:
+        try:
+            conn = pool.get_connection()
+            break
+        except errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+    # Connections can go stale while idle in the pool (wait_timeout, server restart)
+    try:
+        conn.ping(reconnect=True, attempts=2, delay=0)
+    except mysql.connector.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def connect_mysql(force_db=None, allow_local_infile=False):
+    """Return a pooled connection, or a dedicated one when LOCAL INFILE is needed."""
+    if allow_local_infile:
+        return mysql.connector.connect(
+            allow_local_infile=True,
+            **_connection_args(force_db or os.getenv("ACTIVE_DB"))
+        )
+    return get_connection(force_db)
@@ -1,6 +1,64 @@
+import os
+import threading
+import time
 from openai import OpenAI
 from config import OPENAI_API_KEY
 
+# Seconds before a request is abandoned, and how many times the SDK retries
+# (with exponential backoff) on connection errors, 429s and 5xx responses
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+
+_client = None
+_client_lock = threading.Lock()
+_stats = {"calls": 0, "wall_seconds": 0.0, "server_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
 def get_openai_client():
-    """Instantiate and return an OpenAI client."""
-    return OpenAI(api_key=OPENAI_API_KEY)
\ No newline at end of file
+    """Return the process-wide OpenAI client, creating it on first use.
+
+    The client keeps its HTTP connection pool alive between requests, so the
+    TLS handshake is paid once per process instead of once per question.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=OPENAI_MAX_RETRIES
+            )
+    return _client
+
+
+def chat_completion(**kwargs):
+    """Run a chat completion on the shared client and record its latency.
+
+    The `openai-processing-ms` response header gives the time spent server
+    side, so wall time minus that is the client/network overhead.
+    """
+    started = time.perf_counter()
+    raw = get_openai_client().chat.completions.with_raw_response.create(**kwargs)
+    wall = time.perf_counter() - started
+
+    processing_ms = raw.headers.get("openai-processing-ms")
+    server = float(processing_ms) / 1000 if processing_ms else wall
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["wall_seconds"] += wall
+        _stats["server_seconds"] += server
+    return raw.parse()
+
+
+def client_stats():
+    """Return call count plus average wall time and non-model overhead in ms."""
+    with _stats_lock:
+        calls = _stats["calls"]
+        if not calls:
+            return {"calls": 0, "avg_ms": 0.0, "avg_overhead_ms": 0.0}
+        return {
+            "calls": calls,
+            "avg_ms": 1000 * _stats["wall_seconds"] / calls,
+            "avg_overhead_ms": 1000 * (_stats["wall_seconds"] - _stats["server_seconds"]) / calls,
+        }
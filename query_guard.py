@@ -0,0 +1,503 @@
+import datetime
+import decimal
+import json
+import os
+import re
+from dotenv import load_dotenv
+from result_stream import MAX_RESULT_ROWS
+
+# Load environment variables
+load_dotenv(".env")
+
+# What to do with an expensive plan: off | warn | rewrite (SQL only) | refuse
+COST_POLICY = os.getenv("QUERY_COST_POLICY", "off").lower()
+# Estimated rows/documents examined above which a plan counts as expensive
+MAX_ROWS_EXAMINED = int(os.getenv("QUERY_MAX_ROWS_EXAMINED", "1000000"))
+
+
+class QueryRejected(Exception):
+    """Raised when a generated query is not allowed to run."""
+
+
+class QueryTooExpensive(QueryRejected):
+    """Raised by the cost gate when the policy is 'refuse'."""
+
+    def __init__(self, report):
+        super().__init__(f"Query refused by cost gate: {report.describe()}")
+        self.report = report
+
+# --- SQL row budget ---
+
+_TRAILING_LIMIT = re.compile(
+    r"\s+LIMIT\s+(\d+)(?:\s*,\s*(\d+)|\s+OFFSET\s+(\d+))?\s*$", re.IGNORECASE
+)
+_TRAILING_ORDER_BY = re.compile(
+    r"\bORDER\s+BY\s+((?:`?\w+`?\.)?`?(\w+)`?)(?:\s+(ASC|DESC))?\s*$", re.IGNORECASE
+)
+# SELECT ... FROM one table [alias] [WHERE ...]; the lazy scan stops at the first (outer) FROM
+_SINGLE_TABLE = re.compile(
+    r"^\s*SELECT\b(?:(?!\bFROM\b).)*\bFROM\s+`?(\w+)`?(?:\s+(?:AS\s+)?(?!WHERE\b)`?\w+`?)?\s*(?:WHERE\b.*)?$",
+    re.IGNORECASE | re.DOTALL
+)
+_JOIN_OR_SUBQUERY = re.compile(r"\bJOIN\b|\bSELECT\b.*\bSELECT\b", re.IGNORECASE | re.DOTALL)
+_SQL_STRINGS_AND_COMMENTS = re.compile(
+    r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|--[^\n]*|#[^\n]*|/\*.*?\*/", re.DOTALL
+)
+
+
+def is_select(sql_query):
+    return sql_query.lstrip(" (\n\t").lower().startswith(("select", "with"))
+
+
+# --- Read-only checks ---
+
+_SQL_LITERALS_AND_COMMENTS = re.compile(
+    r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`[^`]*`|--[^\n]*|#[^\n]*|/\*.*?\*/", re.DOTALL
+)
+_EXPLAIN_PREFIX = re.compile(
+    r"^(?:explain|describe|desc)\b(?:\s+(?:analyze|extended|partitions|format\s*=\s*\w+))*\s*", re.IGNORECASE
+)
+_WRITE_KEYWORDS = re.compile(
+    r"\b(?:insert|update|delete|drop|alter|create|truncate|grant|revoke|rename|load|handler|call|lock)\b"
+    r"|\binto\s+(?:outfile|dumpfile)\b",
+    re.IGNORECASE
+)
+
+
+def _strip_sql_literals(sql_query):
+    return _SQL_LITERALS_AND_COMMENTS.sub(" ", sql_query)
+
+
+def is_read_only_sql(sql_query):
+    """True for a single SELECT/WITH, SHOW, DESCRIBE or EXPLAIN statement.
+
+    String literals and comments are ignored, a trailing ';' is allowed but
+    a second statement is not, and write keywords anywhere in a SELECT (a
+    data-modifying CTE, SELECT ... INTO OUTFILE, FOR UPDATE) reject it.
+    EXPLAIN/DESCRIBE of a statement is judged by the statement itself, since
+    EXPLAIN ANALYZE runs it.
+    """
+    code = _strip_sql_literals(sql_query).strip().rstrip(";").strip()
+    if not code or ";" in code:
+        return False
+    explained = _EXPLAIN_PREFIX.match(code)
+    if explained:
+        rest = code[explained.end():]
+        if re.match(r"(?:select|with|table|insert|update|delete|replace)\b|\(", rest, re.IGNORECASE):
+            return is_read_only_sql(rest)
+        return bool(re.fullmatch(r"[`\w.]+(?:\s+[`\w.%]+)?", rest))
+    if re.match(r"show\b", code, re.IGNORECASE):
+        return not _WRITE_KEYWORDS.search(code)
+    return is_select(code) and not _WRITE_KEYWORDS.search(code)
+
+
+def _single_table(sql_query):
+    """Return the table a SELECT reads when it reads exactly one, else None.
+
+    A JOIN, a comma join or a subquery anywhere in the query means None.
+    """
+    code = _SQL_STRINGS_AND_COMMENTS.sub("''", sql_query)
+    if _JOIN_OR_SUBQUERY.search(code):
+        return None
+    match = _SINGLE_TABLE.match(code)
+    return match.group(1) if match else None
+
+
+def split_limit(sql_query):
+    """Split a trailing top-level LIMIT off a query: returns (base, limit, offset)."""
+    sql_query = sql_query.strip().rstrip(";").strip()
+    match = _TRAILING_LIMIT.search(sql_query)
+    if not match:
+        return sql_query, None, 0
+    first, second, offset = match.groups()
+    if second is not None:  # LIMIT offset, count
+        return sql_query[:match.start()], int(second), int(first)
+    return sql_query[:match.start()], int(first), int(offset or 0)
+
+
+def apply_sql_limit(sql_query, max_rows=None):
+    """Inject LIMIT into a SELECT that has none, or tighten one above max_rows.
+
+    One row past the budget is requested so callers can tell whether more
+    rows exist. Non-SELECT statements are returned unchanged.
+    """
+    max_rows = MAX_RESULT_ROWS if max_rows is None else max_rows
+    if not max_rows or not is_select(sql_query):
+        return sql_query
+    base, limit, offset = split_limit(sql_query)
+    if limit is not None and limit <= max_rows:
+        return sql_query
+    offset_clause = f" OFFSET {offset}" if offset else ""
+    return f"{base} LIMIT {max_rows + 1}{offset_clause}"
+
+
+def sql_literal(value):
+    """Render a key value from a result row as a MySQL literal."""
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time, datetime.timedelta)):
+        value = str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "X'" + bytes(value).hex() + "'"
+    escaped = str(value).replace("\\", "\\\\").replace("'", "''")
+    return f"'{escaped}'"
+
+
+class SqlPager:
+    """Pages through a generated SELECT one row budget at a time.
+
+    Uses keyset pagination (WHERE key > last ORDER BY key) when the query
+    reads a single table ordered by one of its unique key columns, and falls
+    back to LIMIT/OFFSET otherwise. The query's own LIMIT/OFFSET are honoured.
+    """
+
+    def __init__(self, sql_query, page_size=None, unique_columns=()):
+        self.query = sql_query
+        self.base, self.limit, self.offset = split_limit(sql_query)
+        self.page_size = MAX_RESULT_ROWS if page_size is None else page_size
+        self.position = 0
+        self.last_key = None
+        self.done = False
+        self.key_column, self.descending = None, False
+
+        order = _TRAILING_ORDER_BY.search(self.base)
+        table = _single_table(self.base[:order.start()]) if order else None
+        if order and table and (table, order.group(2)) in set(unique_columns):
+            self.key_column = order.group(2)
+            self.descending = (order.group(3) or "").upper() == "DESC"
+            self._unordered = self.base[:order.start()].rstrip()
+
+    def page_sql(self):
+        """Return (sql, params) for the next page.
+
+        One row past the page is requested to detect 'more', unless the
+        query's own LIMIT ends within this page. `page_rows` is how many
+        rows of the result belong to the page.
+        """
+        if not self.page_size:
+            # 0 means no cap: run the query as written, in one page
+            self.page_rows = 0
+            return self.query, ()
+        self.page_rows = self.page_size
+        fetch = self.page_size + 1
+        if self.limit is not None and self.limit - self.position <= self.page_size:
+            self.page_rows = fetch = self.limit - self.position
+        if self.key_column and self.last_key is not None:
+            direction = "DESC" if self.descending else "ASC"
+            operator = "<" if self.descending else ">"
+            # the key is inlined rather than bound: a %s placeholder would make
+            # the connector treat '%' inside the query's own literals as markers
+            return (
+                f"SELECT * FROM ({self._unordered}) AS _page "
+                f"WHERE `{self.key_column}` {operator} {sql_literal(self.last_key)} "
+                f"ORDER BY `{self.key_column}` {direction} LIMIT {fetch}",
+                ()
+            )
+        return f"{self.base} LIMIT {fetch} OFFSET {self.offset + self.position}", ()
+
+    def record(self, count, last_row, columns, more):
+        """Note the rows shown from the last page so the next one continues after them."""
+        self.position += count
+        if self.key_column and last_row is not None and self.key_column in columns:
+            self.last_key = last_row[columns.index(self.key_column)]
+        elif self.key_column:
+            self.key_column = None  # key not in the output; fall back to OFFSET
+        self.done = not more or (self.limit is not None and self.position >= self.limit)
+
+
+# --- Mongo row budget ---
+
+class MongoCall:
+    """The shape of a generated PyMongo expression: db.<collection>.<method>(...).<chain>..."""
+
+    def __init__(self, collection, method, args, kwargs):
+        self.collection = collection
+        self.method = method
+        self.args = list(args)
+        self.kwargs = dict(kwargs)
+        self.chain = []
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self.chain.append((name, args, kwargs))
+            return self
+        return record
+
+    def run(self, db):
+        result = getattr(db[self.collection], self.method)(*self.args, **self.kwargs)
+        for name, args, kwargs in self.chain:
+            result = getattr(result, name)(*args, **kwargs)
+        return result
+
+
+class _CollectionRecorder:
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, method):
+        if method.startswith("__"):
+            raise AttributeError(method)
+        return lambda *args, **kwargs: MongoCall(self._name, method, args, kwargs)
+
+
+class _DatabaseRecorder:
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _CollectionRecorder(name)
+
+    def __getitem__(self, name):
+        return _CollectionRecorder(name)
+
+    def get_collection(self, name, *args, **kwargs):
+        return _CollectionRecorder(name)
+
+
+def parse_mongo_call(code):
+    """Evaluate generated code against a recorder; returns a MongoCall or None."""
+    try:
+        shape = eval(code, {'__builtins__': {}}, {'db': _DatabaseRecorder()})
+    except Exception:
+        return None
+    return shape if isinstance(shape, MongoCall) else None
+
+
+MONGO_READ_METHODS = {"find", "find_one", "aggregate", "count_documents", "estimated_document_count", "distinct"}
+MONGO_CURSOR_METHODS = {
+    "sort", "limit", "skip", "batch_size", "hint", "max_time_ms", "collation", "comment", "allow_disk_use",
+}
+_MONGO_WRITE_STAGES = {"$out", "$merge"}
+
+
+def _has_write_stage(value):
+    if isinstance(value, dict):
+        return any(key in _MONGO_WRITE_STAGES or _has_write_stage(v) for key, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return any(_has_write_stage(v) for v in value)
+    return False
+
+
+def is_read_only_mongo(code):
+    """True for a single find/aggregate/count/distinct call that cannot write.
+
+    Anything that does not parse as db.<collection>.<read method>(...) with
+    cursor-only chained calls is rejected, as is any $out or $merge stage.
+    """
+    call = parse_mongo_call(code)
+    if call is None or call.method not in MONGO_READ_METHODS:
+        return False
+    if any(name not in MONGO_CURSOR_METHODS for name, _, _ in call.chain):
+        return False
+    return not _has_write_stage([call.args, call.kwargs])
+
+
+def apply_mongo_limit(call, max_rows=None, skip=0):
+    """Add or tighten .limit() / $limit on a find or aggregate call, in place.
+
+    As with SQL, one document past the budget is requested to detect 'more'.
+    """
+    max_rows = MAX_RESULT_ROWS if max_rows is None else max_rows
+    if call.method == "find":
+        limits = [args[0] for name, args, _ in call.chain if name == "limit" and args]
+        skips = [args[0] for name, args, _ in call.chain if name == "skip" and args]
+        call.chain = [step for step in call.chain if step[0] not in ("limit", "skip")]
+
+        budget = max_rows + 1 if max_rows else None
+        if limits and limits[-1] > 0:
+            remaining = limits[-1] - skip
+            budget = min(budget, remaining) if budget else remaining
+        total_skip = (skips[-1] if skips else 0) + skip
+        if total_skip:
+            call.chain.append(("skip", (total_skip,), {}))
+        if budget:
+            # limit(0) means "no limit" to MongoDB, so never go below 1
+            call.chain.append(("limit", (max(budget, 1),), {}))
+    elif call.method == "aggregate" and call.args and isinstance(call.args[0], list):
+        pipeline = list(call.args[0])
+        if pipeline and any(key in pipeline[-1] for key in ("$out", "$merge")):
+            return call
+        if skip:
+            pipeline.append({"$skip": skip})
+        if max_rows:
+            pipeline.append({"$limit": max_rows + 1})
+        call.args[0] = pipeline
+    return call
+
+
+def execute_mongo_code(code, db, max_rows=None, skip=0):
+    """Run generated PyMongo code with the cost gate and a row budget applied to find/aggregate calls."""
+    call = parse_mongo_call(code)
+    if call is None or call.method not in ("find", "aggregate"):
+        return eval(code, {'__builtins__': {}}, {'db': db})
+    if not skip:
+        check_mongo_cost(call, db)
+    return apply_mongo_limit(call, max_rows, skip).run(db)
+
+
+class MongoPager:
+    """Pages through a generated find/aggregate call with skip + limit."""
+
+    def __init__(self, code, page_size=None):
+        self.code = code
+        self.page_size = MAX_RESULT_ROWS if page_size is None else page_size
+        self.position = 0
+        call = parse_mongo_call(code)
+        self.pageable = call is not None and call.method in ("find", "aggregate")
+        self.done = False
+
+    def next_page(self, db):
+        return execute_mongo_code(self.code, db, self.page_size, self.position)
+
+    def record(self, count, more):
+        self.position += count
+        self.done = not (more and self.pageable)
+
+
+# --- EXPLAIN cost gate ---
+
+class CostReport:
+    """What EXPLAIN says a query will cost."""
+
+    def __init__(self, rows_examined=0, full_scans=(), filesort=False):
+        self.rows_examined = int(rows_examined)
+        self.full_scans = list(full_scans)
+        self.filesort = filesort
+
+    @property
+    def expensive(self):
+        return self.rows_examined > MAX_ROWS_EXAMINED
+
+    def describe(self):
+        parts = [f"~{self.rows_examined:,} rows examined"]
+        if self.full_scans:
+            parts.append(f"full scans on {', '.join(self.full_scans)}")
+        if self.filesort:
+            parts.append("filesort")
+        return "; ".join(parts)
+
+
+def _walk_sql_plan(node, report, prefix=1.0):
+    if isinstance(node, list):
+        for item in node:
+            prefix = _walk_sql_plan(item, report, prefix)
+        return prefix
+    if not isinstance(node, dict):
+        return prefix
+
+    if node.get("using_filesort"):
+        report.filesort = True
+    table = node.get("table")
+    if isinstance(table, dict):
+        report.rows_examined += prefix * float(table.get("rows_examined_per_scan", 0))
+        if table.get("access_type") == "ALL":
+            report.full_scans.append(table.get("table_name", "?"))
+        _walk_sql_plan({k: v for k, v in table.items() if isinstance(v, (dict, list))}, report)
+        # rows_produced_per_join already includes the outer tables' fan-out
+        return float(table.get("rows_produced_per_join", prefix))
+
+    for key, value in node.items():
+        if key == "nested_loop":
+            _walk_sql_plan(value, report)
+        elif isinstance(value, (dict, list)):
+            _walk_sql_plan(value, report)
+    return prefix
+
+
+def explain_sql(cursor, sql_query, params=()):
+    """Run EXPLAIN FORMAT=JSON and summarize rows examined, full scans and filesorts."""
+    cursor.execute(f"EXPLAIN FORMAT=JSON {sql_query}", params)
+    plan = json.loads(cursor.fetchone()[0])
+    while cursor.nextset():
+        pass
+    report = CostReport()
+    _walk_sql_plan(plan, report)
+    report.rows_examined = int(report.rows_examined)
+    return report
+
+
+def check_sql_cost(cursor, sql_query, params=(), rewrite=None, policy=None):
+    """Apply the cost policy to a SELECT before it runs; returns the SQL to execute.
+
+    `rewrite(sql_query, report)` is asked for a cheaper query under the
+    'rewrite' policy; it is used only if it is a read-only SELECT whose plan
+    examines fewer rows.
+    """
+    policy = policy or COST_POLICY
+    if policy == "off" or not is_select(sql_query):
+        return sql_query
+    report = explain_sql(cursor, sql_query, params)
+    if not report.expensive:
+        return sql_query
+
+    if policy == "refuse":
+        raise QueryTooExpensive(report)
+    if policy == "rewrite" and rewrite is not None:
+        candidate = rewrite(sql_query, report)
+        # EXPLAIN also accepts UPDATE/DELETE, and the rewrite runs after the
+        # callers' write checks, so only a read-only SELECT may replace the query
+        if not (is_select(candidate) and is_read_only_sql(candidate)):
+            print("⚠️ Cheaper rewrite was not a read-only SELECT; keeping the original.")
+            print(f"⚠️ Expensive query: {report.describe()}")
+            return sql_query
+        try:
+            candidate_report = explain_sql(cursor, candidate, params)
+        except Exception as e:
+            print(f"⚠️ Cheaper rewrite was not valid SQL ({e}); keeping the original.")
+        else:
+            if candidate_report.rows_examined < report.rows_examined:
+                print(f"Rewrote expensive query ({report.describe()} → {candidate_report.describe()}).")
+                return candidate
+    print(f"⚠️ Expensive query: {report.describe()}")
+    return sql_query
+
+
+def _collscans(node, found):
+    if isinstance(node, dict):
+        if node.get("stage") == "COLLSCAN":
+            found.append(node.get("namespace") or node.get("ns") or "?")
+        for value in node.values():
+            _collscans(value, found)
+    elif isinstance(node, list):
+        for item in node:
+            _collscans(item, found)
+    return found
+
+
+def explain_mongo(call, db):
+    """queryPlanner-level explain of a find/aggregate call; flags COLLSCANs."""
+    if call.method == "find":
+        command = {"find": call.collection}
+        if call.args:
+            command["filter"] = call.args[0]
+        if len(call.args) > 1 and call.args[1]:
+            command["projection"] = call.args[1]
+        for name, args, _ in call.chain:
+            if name == "sort" and args:
+                command["sort"] = dict(args[0]) if isinstance(args[0], list) else {args[0]: args[1] if len(args) > 1 else 1}
+    else:
+        command = {"aggregate": call.collection, "pipeline": call.args[0] if call.args else [], "cursor": {}}
+
+    plan = db.command("explain", command, verbosity="queryPlanner")
+    report = CostReport()
+    if _collscans(plan, []):
+        # queryPlanner has no row estimate; a COLLSCAN reads the whole collection
+        report.full_scans = [call.collection]
+        report.rows_examined = db[call.collection].estimated_document_count()
+    return report
+
+
+def check_mongo_cost(call, db, policy=None):
+    """Apply the cost policy ('warn' or 'refuse') to a find/aggregate call."""
+    policy = policy or COST_POLICY
+    if policy == "off":
+        return
+    report = explain_mongo(call, db)
+    if report.full_scans:
+        print(f"⚠️ COLLSCAN on {call.collection}: {report.describe()}")
+    if report.expensive and policy == "refuse":
+        raise QueryTooExpensive(report)
@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+from itertools import islice
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(".env")
+
+# Rows pulled from the server per round-trip
+FETCH_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", "500"))
+# Rows shown per result before "more rows available"; 0 means no cap
+MAX_RESULT_ROWS = int(os.getenv("MAX_RESULT_ROWS", "1000"))
+
+
+def iter_sql_rows(cursor, batch_size=None):
+    """Yield rows from an (unbuffered) DB-API cursor, fetchmany() at a time."""
+    batch_size = batch_size or FETCH_BATCH_SIZE
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def iter_mongo_docs(result, batch_size=None):
+    """Yield documents from a PyMongo cursor, asking the server for batch_size at a time."""
+    if hasattr(result, "batch_size"):
+        result = result.batch_size(batch_size or FETCH_BATCH_SIZE)
+    yield from result
+
+
+def is_cursor_like(result):
+    return hasattr(result, '__iter__') and not isinstance(result, (str, bytes, dict))
+
+
+def _row_cap(max_rows):
+    max_rows = MAX_RESULT_ROWS if max_rows is None else max_rows
+    return max_rows or None
+
+
+def take(rows, max_rows=None):
+    """Collect up to max_rows rows; returns (rows, more_available)."""
+    cap = _row_cap(max_rows)
+    if cap is None:
+        return list(rows), False
+    rows = iter(rows)
+    taken = list(islice(rows, cap))
+    return taken, next(rows, None) is not None
+
+
+def write_rows(rows, out=None, max_rows=None, format_row=None):
+    """Write rows to `out` as they arrive; returns (rows_written, more_available)."""
+    out = out or sys.stdout
+    format_row = format_row or (lambda row: ", ".join(str(item) for item in row))
+    cap = _row_cap(max_rows)
+    count = 0
+    for row in rows:
+        if cap is not None and count >= cap:
+            return count, True
+        out.write(format_row(row) + "\n")
+        count += 1
+    return count, False
+
+
+def write_mongo_result(result, out=None, max_rows=None):
+    """Stream a Mongo cursor as one JSON document per line, or print a scalar result."""
+    out = out or sys.stdout
+    if not is_cursor_like(result):
+        out.write(json.dumps(result, default=str) + "\n")
+        return 1, False
+    count, more = write_rows(
+        iter_mongo_docs(result), out, max_rows,
+        format_row=lambda doc: json.dumps(doc, default=str)
+    )
+    if more and hasattr(result, "close"):
+        result.close()  # release the server-side cursor early
+    return count, more
+
+
+def summarize(count, more):
+    if more:
+        return f"{count} rows shown; more rows available."
+    return f"{count} rows." if count else "No results."
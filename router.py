@@ -0,0 +1,62 @@
+import os
+from dotenv import load_dotenv
+from semantic_cache import tokenize
+import fast_path
+
+# Load environment variables
+load_dotenv(".env")
+
+# Below this confidence nl_to_sql translates against every candidate database
+ROUTE_CONFIDENCE = float(os.getenv("ROUTE_CONFIDENCE", "0.75"))
+# Database used when the question carries no routing signal
+DEFAULT_ROUTE = "DB_MOVIELENS"
+
+# Weighted keywords per database (matched after semantic_cache.tokenize,
+# so "movies"/"films" arrive as "movie" and "deaths" as "death")
+ROUTE_KEYWORDS = {
+    "DB_SARS": {
+        "sars": 3, "outbreak": 2, "epidemic": 2, "fatality": 2, "imported": 2,
+        "infected": 2, "recovered": 2, "death": 1, "case": 1, "country": 1, "region": 1,
+        "china": 1, "taiwan": 1,
+    },
+    "DB_MOVIELENS": {
+        "movie": 2, "genre": 2, "rating": 2, "rated": 1, "title": 1, "tag": 1, "user": 1,
+        "release": 1, "released": 1, "imdb": 2, "tmdb": 2,
+    },
+}
+# A genre or country named in the question counts this much for its database
+VOCABULARY_WEIGHT = 2
+
+
+def score_databases(question):
+    """Return {db_env: score} from keywords and the genre/country vocabularies."""
+    tokens = tokenize(question)
+    scores = {
+        db_env: sum(keywords.get(token, 0) for token in tokens)
+        for db_env, keywords in ROUTE_KEYWORDS.items()
+    }
+    text = f" {question.lower()} "
+    if any(f" {genre.lower()} " in text for genre in fast_path.sql_genres()):
+        scores["DB_MOVIELENS"] += VOCABULARY_WEIGHT
+    if any(f" {country.lower()} " in text for country in fast_path.sql_countries()):
+        scores["DB_SARS"] += VOCABULARY_WEIGHT
+    return scores
+
+
+def route(question):
+    """Rank the databases for `question`.
+
+    Returns ([(db_env, confidence), ...] best first, confident) where
+    confidence is the database's share of the total score and `confident`
+    says whether the best one clears ROUTE_CONFIDENCE.
+    """
+    scores = score_databases(question)
+    total = sum(scores.values())
+    if not total:
+        ranked = [(DEFAULT_ROUTE, 1 / len(scores))]
+        ranked += [(db_env, 1 / len(scores)) for db_env in scores if db_env != DEFAULT_ROUTE]
+        return ranked, False
+    # ties go to the default database
+    ranked = sorted(((db_env, score / total) for db_env, score in scores.items()),
+                    key=lambda item: (item[1], item[0] == DEFAULT_ROUTE), reverse=True)
+    return ranked, ranked[0][1] >= ROUTE_CONFIDENCE
@@ -0,0 +1,165 @@
+import os
+import re
+from dotenv import load_dotenv
+from semantic_cache import tokenize
+from translation_cache import normalize_question
+from TableSetup import format_schema
+import fast_path
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Load environment variables
+load_dotenv(".env")
+
+# Tables wider than this only keep their key columns and the columns the question mentions
+PRUNE_COLUMNS_OVER = int(os.getenv("SCHEMA_PRUNE_COLUMNS_OVER", "8"))
+# Shortest common prefix that counts as a match ("released" ~ "release_year", "movie" ~ "movieid")
+MIN_PREFIX = 4
+
+_encoding = None
+
+
+def estimate_tokens(text):
+    """Count prompt tokens with tiktoken when installed, else roughly len/4."""
+    global _encoding
+    if tiktoken is None:
+        return max(1, len(text) // 4)
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_encoding.encode(text))
+
+
+def _identifier_tokens(name):
+    name = re.sub(r"([a-z])([A-Z])", r"\1 \2", name)
+    return set(tokenize(name.replace("_", " ")))
+
+
+def _matches(question_tokens, name_tokens):
+    """Return the question tokens that match any of the identifier tokens."""
+    found = set()
+    for q in question_tokens:
+        for t in name_tokens:
+            if q == t or (min(len(q), len(t)) >= MIN_PREFIX and (q.startswith(t) or t.startswith(q))):
+                found.add(q)
+    return found
+
+
+def _covers(question_tokens, name_tokens):
+    """True when every identifier token matches some question token."""
+    return bool(name_tokens) and all(_matches(question_tokens, {t}) for t in name_tokens)
+
+
+def _mentioned(question, values):
+    """Vocabulary values (genres, countries) that appear in the question."""
+    text = f" {normalize_question(question)} "
+    return [v for v in values if re.search(rf"(?<!\w){re.escape(v.lower())}(?!\w)", text)]
+
+
+def report(label, full_text, pruned_text):
+    before, after = estimate_tokens(full_text), estimate_tokens(pruned_text)
+    print(f"{label} schema: {before} → {after} tokens")
+
+
+# --- SQL ---
+
+def prune_tables(question, tables):
+    """Keep the tables the question refers to, and the relevant columns of wide ones.
+
+    `tables` is {table: [(column, column_type, column_key), ...]} as returned
+    by get_schema_columns. A table is kept when its name, one of its non-key
+    columns, or a genre/country value held in it matches the question. The
+    full schema is returned when nothing matches.
+    """
+    question_tokens = set(tokenize(question))
+    column_names = {c for columns in tables.values() for c, _, _ in columns}
+    vocabulary_hits = set()
+    if column_names & {"genre", "genres"} and _mentioned(question, fast_path.sql_genres()):
+        vocabulary_hits.update({"genre", "genres"})
+    if any("country" in c for c in column_names) and _mentioned(question, fast_path.sql_countries()):
+        vocabulary_hits.update(c for c in column_names if "country" in c)
+
+    pruned = {}
+    for table, columns in tables.items():
+        matched_columns = [
+            c for c, _, _ in columns
+            if c in vocabulary_hits or _matches(question_tokens, _identifier_tokens(c))
+        ]
+        # id columns are join keys, so matching "movie" against movieid says nothing
+        data_columns = [c for c, _, key in columns if not key and not c.endswith("id")]
+        table_hit = _matches(question_tokens, _identifier_tokens(table))
+        if not table_hit and not set(matched_columns) & (set(data_columns) | vocabulary_hits):
+            continue
+        if len(columns) > PRUNE_COLUMNS_OVER:
+            columns = [col for col in columns if col[2] or col[0] in matched_columns]
+        pruned[table] = columns
+    return pruned or tables
+
+
+def prune_sql_schema(question, tables):
+    """Return the schema text for `question`, printing the token savings."""
+    pruned = format_schema(prune_tables(question, tables))
+    report("SQL", format_schema(tables), pruned)
+    return pruned
+
+
+# --- MongoDB ---
+
+def _split_collections(schema_text):
+    """Split a "• collection / - field (type)" summary into (header, {collection: block}, relationships)."""
+    header, bullet, rest = schema_text.partition("•")
+    if not bullet:
+        return schema_text, {}, []
+    body, _, relationships = ("•" + rest).partition("Relationships")
+    blocks = {}
+    for block in re.split(r"\n\s*\n", body.strip()):
+        m = re.match(r"\s*•\s*(\w+)", block)
+        if m:
+            blocks[m.group(1)] = block.rstrip()
+    return header, blocks, [line for line in relationships.splitlines() if "→" in line]
+
+
+def _fields(block):
+    return re.findall(r"^\s*-\s*([\w.]+)", block, re.MULTILINE)
+
+
+def prune_mongo_schema(question, schema_text):
+    """Keep only the collections `question` refers to in a Mongo schema summary.
+
+    Collections match on every word of their name ("embedded_movies" needs
+    both). A field named in the question adds its collection when no kept
+    collection already has that field, preferring the shortest name, and a
+    genre from the database pulls in `movies`. Relationship lines are kept
+    when both ends survive; the full text is returned when nothing matches.
+    """
+    header, blocks, relationships = _split_collections(schema_text)
+    question_tokens = set(tokenize(question))
+
+    kept = {name for name in blocks if _covers(question_tokens, _identifier_tokens(name))}
+    if "movies" in blocks and _mentioned(question, fast_path.mongo_genres()):
+        kept.add("movies")
+    for name in sorted(blocks, key=len):
+        for field in _fields(blocks[name]):
+            if field.startswith("_"):
+                continue
+            if not _covers(question_tokens, _identifier_tokens(field)):
+                continue
+            if not any(field in _fields(blocks[k]) for k in kept):
+                kept.add(name)
+
+    if not kept:
+        pruned = schema_text
+    else:
+        lines = [header.rstrip(), ""]
+        lines += [f"{blocks[name]}\n" for name in blocks if name in kept]
+        links = [
+            line for line in relationships
+            if all(c in kept for c in re.findall(r"(\w+)\.\w+", line))
+        ]
+        if links:
+            lines += ["Relationships", *links]
+        pruned = "\n".join(lines) + "\n"
+    report("MongoDB", schema_text, pruned)
+    return pruned
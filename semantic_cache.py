@@ -0,0 +1,148 @@
+import math
+import os
+import re
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from translation_cache import normalize_question
+
+# Load environment variables
+load_dotenv(".env")
+
+# Minimum cosine similarity for reusing a cached query
+SIMILARITY_THRESHOLD = float(os.getenv("CHATDB_SEMANTIC_THRESHOLD", "0.9"))
+# Questions kept in the index; the oldest are dropped first
+SEMANTIC_MAX_ENTRIES = int(os.getenv("CHATDB_SEMANTIC_MAX_ENTRIES", "1000"))
+
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "in", "on", "to", "me", "please", "what", "which",
+    "is", "are", "was", "were", "do", "does", "did", "can", "you", "i", "that", "with",
+    "and", "by", "all", "their", "its", "there", "how", "many", "much",
+    "list", "show", "display", "find", "get", "give", "return", "tell",
+}
+
+# Folds common paraphrases onto one token before vectorizing
+TOKEN_SYNONYMS = {
+    "movies": "movie", "film": "movie", "flick": "movie",
+    "best": "top", "highest": "top", "greatest": "top",
+    "worst": "bottom", "lowest": "bottom",
+    "avg": "average", "mean": "average",
+    "nation": "country",
+}
+
+NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "nine": "9", "ten": "10", "twenty": "20",
+    "fifty": "50", "hundred": "100",
+}
+
+
+def tokenize(question):
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", normalize_question(question)):
+        word = NUMBER_WORDS.get(word, word)
+        if word in STOPWORDS:
+            continue
+        if word in TOKEN_SYNONYMS:
+            tokens.append(TOKEN_SYNONYMS[word])
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(TOKEN_SYNONYMS.get(word, word))
+    return tokens
+
+
+class SemanticCache:
+    """TF-IDF nearest-neighbour lookup over previously translated questions.
+
+    Complements TranslationCache, which only hits on exact (normalized)
+    matches: a question is answered from the closest cached question in the
+    same scope when their cosine similarity clears the threshold and both
+    mention exactly the same numbers, so "top 5" never reuses "top 10".
+    """
+
+    def __init__(self, source=None, threshold=None, max_entries=None):
+        self.threshold = SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.max_entries = SEMANTIC_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        self._source = source
+        self._entries = []
+        self._matrix = None
+        self._vocab = {}
+        self._idf = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._source is not None:
+            for question, scope, value in self._source.entries():
+                self._entries.append((tokenize(question), question, scope, value))
+            self._entries = self._entries[-self.max_entries:]
+            self._source = None
+            self._matrix = None
+
+    def _build_index(self):
+        self._vocab = {}
+        for tokens, *_ in self._entries:
+            for token in tokens:
+                self._vocab.setdefault(token, len(self._vocab))
+
+        counts = np.zeros((len(self._entries), len(self._vocab)), dtype=np.float32)
+        for row, (tokens, *_) in enumerate(self._entries):
+            for token in tokens:
+                counts[row, self._vocab[token]] += 1
+
+        doc_freq = (counts > 0).sum(axis=0)
+        self._idf = np.log((1 + len(self._entries)) / (1 + doc_freq)).astype(np.float32) + 1
+        matrix = counts * self._idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._matrix = matrix / np.where(norms == 0, 1, norms)
+
+    def _vectorize(self, tokens):
+        vector = np.zeros(len(self._vocab), dtype=np.float32)
+        unseen_weight = 0.0
+        # Words the index has never seen count fully against the match
+        max_idf = math.log(1 + len(self._entries)) + 1
+        for token in tokens:
+            index = self._vocab.get(token)
+            if index is None:
+                unseen_weight += max_idf ** 2
+            else:
+                vector[index] += self._idf[index]
+        norm = math.sqrt(float(vector @ vector) + unseen_weight)
+        return vector / norm if norm else vector
+
+    def lookup(self, question, scope=""):
+        """Return (value, similarity, cached_question) for the best match, or None."""
+        tokens = tokenize(question)
+        numbers = {token for token in tokens if token.isdigit()}
+        with self._lock:
+            self._ensure_loaded()
+            if not self._entries or not tokens:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._build_index()
+
+            scores = self._matrix @ self._vectorize(tokens)
+            for row in np.argsort(scores)[::-1]:
+                if scores[row] < self.threshold:
+                    break
+                cached_tokens, cached_question, cached_scope, value = self._entries[row]
+                if cached_scope == scope and numbers == {t for t in cached_tokens if t.isdigit()}:
+                    self.hits += 1
+                    return value, float(scores[row]), cached_question
+            self.misses += 1
+            return None
+
+    def add(self, question, value, scope=""):
+        with self._lock:
+            self._ensure_loaded()
+            self._entries.append((tokenize(question), normalize_question(question), scope, value))
+            self._entries = self._entries[-self.max_entries:]
+            self._matrix = None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
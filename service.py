@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from result_stream import MAX_RESULT_ROWS, is_cursor_like, iter_mongo_docs, iter_sql_rows, take
+from query_guard import (
+    QueryRejected, apply_sql_limit, check_sql_cost, execute_mongo_code, is_read_only_mongo, is_read_only_sql
+)
+
+# Load environment variables
+load_dotenv(".env")
+
+# Threads that run the blocking LLM and database calls off the event loop
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "16"))
+MAX_BODY_BYTES = 64 * 1024
+
+
+# --- Translation / execution (blocking; run in the worker pool) ---
+
+def translate(question, backend="sql"):
+    """Translate a question for `backend` ("sql" or "mongo")."""
+    if backend == "sql":
+        from SQL_API import normalize_query_input, nl_to_sql
+        sql_query, target_db = nl_to_sql(normalize_query_input(question))
+        return {"backend": "sql", "database": target_db, "query": sql_query}
+    if backend == "mongo":
+        from translator import translate_nl_to_code
+        return {"backend": "mongo", "database": "sample_mflix", "query": translate_nl_to_code(question)}
+    raise ValueError(f"Unknown backend: {backend!r}")
+
+
+def execute(translation, max_rows=None):
+    """Run a translated query read-only and return its columns and (capped) rows."""
+    if translation["backend"] == "sql":
+        return _execute_sql(translation["query"], translation["database"], max_rows)
+    return _execute_mongo(translation["query"], max_rows)
+
+
+def _execute_sql(sql_query, target_db, max_rows=None):
+    from mysql_client import connect_mysql
+    from SQL_API import cheaper_rewrite
+    from index_advisor import log_query
+
+    if not is_read_only_sql(sql_query):
+        raise QueryRejected("Only single SELECT, SHOW, DESCRIBE or EXPLAIN statements are allowed through the service.")
+
+    log_query(target_db, sql_query)
+    conn = connect_mysql(target_db)
+    cursor = conn.cursor()
+    try:
+        sql_query = check_sql_cost(cursor, sql_query, rewrite=cheaper_rewrite(target_db))
+        cursor.execute(apply_sql_limit(sql_query, max_rows))
+        if not cursor.description:
+            return {"columns": [], "rows": [], "more": False}
+        columns = [desc[0] for desc in cursor.description]
+        rows, more = take(iter_sql_rows(cursor), max_rows)
+        if more:
+            conn.consume_results()
+        return {"columns": columns, "rows": [list(row) for row in rows], "more": more}
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _execute_mongo(code, max_rows=None):
+    from mongo_client import get_database
+
+    if not is_read_only_mongo(code):
+        raise QueryRejected("Only find, aggregate, count and distinct calls without $out/$merge are allowed through the service.")
+
+    result = execute_mongo_code(code, get_database(), max_rows)
+    if is_cursor_like(result):
+        rows, more = take(iter_mongo_docs(result), max_rows)
+        return {"columns": None, "rows": rows, "more": more}
+    return {"columns": None, "rows": [result], "more": False}
+
+
+def answer(question, backend="sql", max_rows=None):
+    """Translate and execute one question, with per-stage timings in ms."""
+    started = time.perf_counter()
+    translation = translate(question, backend)
+    translated = time.perf_counter()
+    result = execute(translation, max_rows)
+    finished = time.perf_counter()
+    return {
+        **translation,
+        **result,
+        "translate_ms": round(1000 * (translated - started), 1),
+        "execute_ms": round(1000 * (finished - translated), 1),
+    }
+
+
+# --- HTTP front end ---
+
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        return None
+    method, path, _ = request_line.split(" ", 2)
+
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Request body too large.")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, body
+
+
+def _request_max_rows(value):
+    """Validate a request's max_rows: a positive int, clamped to MAX_RESULT_ROWS."""
+    if value is None:
+        return MAX_RESULT_ROWS
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError("'max_rows' must be a positive integer.")
+    return min(value, MAX_RESULT_ROWS) if MAX_RESULT_ROWS else value
+
+
+async def _write_response(writer, status, payload):
+    body = json.dumps(payload, default=str).encode()
+    reason = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 500: "Internal Server Error"}[status]
+    writer.write(
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+
+async def _handle_connection(reader, writer, executor):
+    status, payload = 200, {}
+    try:
+        request = await _read_request(reader)
+        if request is None:
+            return
+        method, path, body = request
+
+        if method == "GET" and path == "/health":
+            payload = {"status": "ok"}
+        elif method == "POST" and path == "/query":
+            data = json.loads(body or b"{}")
+            question = (data.get("question") or "").strip()
+            if not question:
+                raise ValueError("Missing 'question'.")
+            max_rows = _request_max_rows(data.get("max_rows"))
+            loop = asyncio.get_running_loop()
+            payload = await loop.run_in_executor(
+                executor, answer, question, data.get("backend", "sql"), max_rows
+            )
+        else:
+            status, payload = 404, {"error": f"No route for {method} {path}"}
+    except QueryRejected as e:
+        status, payload = 403, {"error": str(e)}
+    except (ValueError, json.JSONDecodeError) as e:
+        status, payload = 400, {"error": str(e)}
+    except Exception as e:
+        status, payload = 500, {"error": str(e)}
+
+    try:
+        await _write_response(writer, status, payload)
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8551, workers=None):
+    """Serve POST /query {"question": ..., "backend": "sql" | "mongo", "max_rows": N} until cancelled."""
+    executor = ThreadPoolExecutor(max_workers=workers or SERVICE_WORKERS)
+    server = await asyncio.start_server(
+        lambda r, w: _handle_connection(r, w, executor), host, port
+    )
+    print(f"ChatDB service listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent HTTP service for ChatDB questions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8551)
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads for LLM/database calls")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        print("Shutting down.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import csv
+import json
+import re
+import threading
+from collections import Counter
+
+
+def _build_trie(aliases):
+    trie = {}
+    for alias in aliases:
+        node = trie
+        for ch in alias:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return trie
+
+
+def _trie_pattern(node):
+    """Render a character trie as one regex; shared prefixes are matched once."""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    if "" in node:
+        return "(?:" + "|".join(branches) + ")?"
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+
+class SynonymNormalizer:
+    """Replaces aliases ("usa", "u.k.") with canonical names in one regex pass.
+
+    All aliases are compiled into a single trie-shaped pattern, so a scan
+    costs about the same with eight aliases or eight thousand. Matches are
+    case-insensitive, whole-word (`(?<!\\w)` / `(?!\\w)`) and longest-first,
+    so "u.s.a." is never rewritten as "u.s." plus a stray "a.".
+    """
+
+    def __init__(self, aliases=None):
+        self.hits = Counter()
+        self._aliases = {}
+        self._pattern = None
+        self._lock = threading.Lock()
+        if aliases:
+            self.add(aliases)
+
+    def add(self, aliases):
+        """Merge {alias: canonical} (or (alias, canonical) pairs) and recompile."""
+        pairs = aliases.items() if isinstance(aliases, dict) else aliases
+        with self._lock:
+            for alias, canonical in pairs:
+                alias = alias.strip().lower()
+                if alias:
+                    self._aliases[alias] = canonical
+            trie = _build_trie(self._aliases)
+            self._pattern = re.compile(rf"(?<!\w){_trie_pattern(trie)}(?!\w)", re.IGNORECASE) if trie else None
+        return len(self._aliases)
+
+    def load_file(self, path):
+        """Load aliases from a JSON object or an `alias,canonical` CSV/TSV file."""
+        with open(path, encoding="utf-8", newline="") as f:
+            if path.endswith(".json"):
+                return self.add(json.load(f))
+            rows = csv.reader(f, delimiter="\t" if path.endswith(".tsv") else ",")
+            return self.add((row[0], row[1]) for row in rows if len(row) >= 2 and not row[0].startswith("#"))
+
+    def load_database(self, db_name, sql_query):
+        """Load aliases from a MySQL query returning (alias, canonical) rows."""
+        from mysql_client import connect_mysql
+        conn = connect_mysql(db_name)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql_query)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        return self.add((str(alias), str(canonical)) for alias, canonical in rows)
+
+    def normalize(self, text):
+        pattern = self._pattern
+        if pattern is None:
+            return text
+
+        def replace(match):
+            alias = match.group(0).lower()
+            self.hits[alias] += 1
+            return self._aliases.get(alias, match.group(0))
+
+        return pattern.sub(replace, text)
+
+    def stats(self, top=10):
+        return {
+            "aliases": len(self._aliases),
+            "hits": sum(self.hits.values()),
+            "top": self.hits.most_common(top),
+        }
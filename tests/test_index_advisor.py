@@ -0,0 +1,28 @@
+from index_advisor import referenced_columns
+
+TABLES = {
+    "movies_clean": [("movieid", "int", "PRI"), ("title", "text", ""), ("release_year", "int", "")],
+    "ratings": [("userid", "int", "PRI"), ("movieid", "int", "PRI"), ("rating", "double", "")],
+    "movie_genres": [("movieid", "int", "MUL"), ("genre", "varchar(32)", "MUL")],
+}
+
+
+def test_unaliased_join_sees_every_table():
+    query = ("SELECT `title` FROM `ratings` JOIN `movies_clean` ON `ratings`.`movieid` = `movies_clean`.`movieid` "
+             "JOIN `movie_genres` ON `movie_genres`.`movieid` = `movies_clean`.`movieid` "
+             "WHERE `release_year` > 2000 ORDER BY `rating` DESC")
+
+    found = referenced_columns(query, TABLES)
+
+    assert ("movies_clean", "movieid") in found
+    assert ("movies_clean", "release_year") in found
+    assert ("movie_genres", "movieid") in found
+    assert ("ratings", "rating") in found
+
+
+def test_join_using_attributes_filter_column():
+    query = "SELECT title FROM movies_clean JOIN movie_genres USING (movieid) WHERE genre = 'Horror'"
+
+    found = referenced_columns(query, TABLES)
+
+    assert found == {("movie_genres", "genre"), ("movie_genres", "movieid"), ("movies_clean", "movieid")}
@@ -0,0 +1,69 @@
+import random
+
+from bson import ObjectId
+
+import mongo_schema
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        return iter(self.docs)
+
+    def index_information(self):
+        return {"_id_": {"key": [("_id", 1)]}, "year_1": {"key": [("year", 1)]}}
+
+    def estimated_document_count(self):
+        return len(self.docs) * 100
+
+
+class _Database(dict):
+    def list_collection_names(self):
+        return list(self)
+
+
+def _movies(seed):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(200):
+        doc = {"_id": ObjectId(), "title": f"Movie {i}", "year": 1990 + i % 30,
+               "imdb": {"rating": 7.5 if rng.random() > 0.3 else ""}}
+        if rng.random() < 0.02:
+            doc["tomatoes"] = {"viewer": {"rating": 3.1}}
+        docs.append(doc)
+    rng.shuffle(docs)
+    return docs
+
+
+def test_resampling_keeps_the_hash(monkeypatch):
+    hashes = set()
+    for seed in range(5):
+        db = _Database(movies=_Collection(_movies(seed)))
+        monkeypatch.setattr(mongo_schema, "get_database", lambda name: db)
+        text, digest = mongo_schema.build_summary()
+        hashes.add(digest)
+    assert len(hashes) == 1
+    assert "imdb.rating (number or string)" in text
+
+
+def test_new_field_changes_the_hash(monkeypatch):
+    docs = _movies(0)
+    db = _Database(movies=_Collection(docs))
+    monkeypatch.setattr(mongo_schema, "get_database", lambda name: db)
+    _, before = mongo_schema.build_summary()
+    for doc in docs:
+        doc["runtime"] = 120
+    _, after = mongo_schema.build_summary()
+    assert before != after
+
+
+def test_empty_database_is_a_sampling_failure(monkeypatch, tmp_path):
+    monkeypatch.setattr(mongo_schema, "get_database", lambda name: _Database())
+    monkeypatch.setattr(mongo_schema, "SCHEMA_CACHE_PATH", str(tmp_path / "schema.json"))
+    monkeypatch.setattr(mongo_schema, "_summaries", {})
+    monkeypatch.setattr(mongo_schema, "_failed", {})
+
+    assert mongo_schema.get_schema_entry("sample_mflx") is None
+    assert not (tmp_path / "schema.json").exists()
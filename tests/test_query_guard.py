@@ -0,0 +1,105 @@
+import json
+
+from mysql.connector.cursor import RE_PY_PARAM
+
+from query_guard import SqlPager, check_sql_cost
+
+MOVIES = {("movies_clean", "movieid")}
+LIKE_QUERY = "SELECT `movieid`,`title` FROM `movies_clean` WHERE `title` LIKE '%star%' ORDER BY `movieid`"
+
+
+def test_keyset_second_page_keeps_like_literal():
+    pager = SqlPager(LIKE_QUERY, page_size=2, unique_columns=MOVIES)
+    pager.page_sql()
+    pager.record(2, (260, "Star Wars"), ["movieid", "title"], more=True)
+
+    sql, params = pager.page_sql()
+
+    # mysql-connector skips placeholder substitution only when params is empty
+    assert params == ()
+    assert "LIKE '%star%'" in sql
+    assert "`movieid` > 260" in sql
+    assert sql.endswith("ORDER BY `movieid` ASC LIMIT 3")
+
+
+def test_keyset_literals_are_not_rewritten():
+    query = ("SELECT `movieid`, DATE_FORMAT(`d`, '%Y') FROM `movies_clean` "
+             "WHERE `note` = '100%' ORDER BY `movieid`")
+    pager = SqlPager(query, page_size=1, unique_columns=MOVIES)
+    pager.page_sql()
+    pager.record(1, (7, "1995"), ["movieid", "d"], more=True)
+
+    sql, params = pager.page_sql()
+
+    assert params == ()
+    assert "'%Y'" in sql and "'100%'" in sql and "%%" not in sql
+
+
+def test_keyset_string_key_is_escaped():
+    pager = SqlPager("SELECT `genre` FROM `genre_rating_stats` ORDER BY `genre`", page_size=1,
+                     unique_columns={("genre_rating_stats", "genre")})
+    pager.page_sql()
+    pager.record(1, ("Children's",), ["genre"], more=True)
+
+    sql, _ = pager.page_sql()
+
+    assert "`genre` > 'Children''s'" in sql
+    assert not RE_PY_PARAM.search(sql.encode())
+
+
+def test_zero_page_size_is_unpaged():
+    pager = SqlPager("SELECT * FROM `ratings`", page_size=0)
+
+    sql, params = pager.page_sql()
+
+    assert sql == "SELECT * FROM `ratings`"
+    assert params == ()
+    assert pager.page_rows == 0
+
+
+class _PlanCursor:
+    """Fake cursor whose EXPLAIN reports `rows` examined for any statement."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchone(self):
+        table = {"table_name": "ratings", "access_type": "ALL", "rows_examined_per_scan": self.rows}
+        return (json.dumps({"query_block": {"table": table}}),)
+
+    def nextset(self):
+        return None
+
+
+def test_rewrite_must_be_a_select():
+    original = "SELECT * FROM `ratings`"
+    checked = check_sql_cost(_PlanCursor(10 ** 7), original,
+                             rewrite=lambda sql, report: "DELETE FROM `ratings`", policy="rewrite")
+    assert checked == original
+
+
+def test_keyset_skips_joins_and_subqueries():
+    queries = [
+        "SELECT m.`movieid`, r.`rating` FROM `movies_clean` m JOIN `ratings` r ON m.`movieid` = r.`movieid` "
+        "WHERE m.`movieid` IN (SELECT `movieid` FROM `links_clean` WHERE `imdbid` > 0) ORDER BY `movieid`",
+        "SELECT `movieid` FROM `movies_clean` WHERE `movieid` IN (SELECT `movieid` FROM `ratings`) "
+        "ORDER BY `movieid`",
+        "SELECT m.`movieid` FROM `movies_clean` m, `ratings` r WHERE m.`movieid` = r.`movieid` ORDER BY `movieid`",
+    ]
+    for query in queries:
+        pager = SqlPager(query, page_size=2, unique_columns=MOVIES)
+        pager.page_sql()
+        pager.record(2, (1,), ["movieid"], more=True)
+
+        sql, _ = pager.page_sql()
+
+        assert pager.key_column is None
+        assert sql.endswith("LIMIT 3 OFFSET 2")
+
+
+def test_keyset_ignores_keywords_in_literals():
+    query = "SELECT `movieid` FROM `movies_clean` WHERE `title` = 'Select, Join' ORDER BY `movieid`"
+    assert SqlPager(query, page_size=2, unique_columns=MOVIES).key_column == "movieid"
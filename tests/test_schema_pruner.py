@@ -0,0 +1,6 @@
+from schema_pruner import prune_mongo_schema
+
+
+def test_summary_without_collections_is_returned_unchanged():
+    summary = "Database: sample_mflx\n\nCollections & Fields (with types)\n"
+    assert prune_mongo_schema("top rated movies", summary) == summary
@@ -0,0 +1,16 @@
+import pytest
+
+import service
+
+
+def test_max_rows_is_clamped_to_the_budget(monkeypatch):
+    monkeypatch.setattr(service, "MAX_RESULT_ROWS", 1000)
+    assert service._request_max_rows(None) == 1000
+    assert service._request_max_rows(50) == 50
+    assert service._request_max_rows(10 ** 9) == 1000
+
+
+@pytest.mark.parametrize("value", [0, -5, "10", 2.5, True])
+def test_bad_max_rows_is_a_client_error(value):
+    with pytest.raises(ValueError):
+        service._request_max_rows(value)
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(".env")
+
+CACHE_PATH = os.getenv("CHATDB_CACHE_PATH", ".chatdb_cache.sqlite")
+# Entries kept per namespace before least-recently-used ones are evicted
+CACHE_MAX_ENTRIES = int(os.getenv("CHATDB_CACHE_MAX_ENTRIES", "1000"))
+# Seconds a translation stays valid; 0 disables expiry
+CACHE_TTL = float(os.getenv("CHATDB_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def normalize_question(question: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip("?.! ")
+
+
+class TranslationCache:
+    """Persistent LRU/TTL cache of generated queries, stored in SQLite.
+
+    Entries are keyed by namespace (e.g. "sql", "mongo"), the normalized
+    question and a caller-supplied scope such as database name plus schema
+    fingerprint, so a schema change naturally misses.
+    """
+
+    def __init__(self, namespace, path=None, max_entries=None, ttl=None):
+        self.namespace = namespace
+        self.max_entries = CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = CACHE_TTL if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or CACHE_PATH, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                question TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS translations_lru ON translations (namespace, last_used)"
+        )
+        self._conn.commit()
+
+    def _key(self, question, scope):
+        raw = "\x1f".join((self.namespace, normalize_question(question), scope))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, question, scope=""):
+        """Return the cached value for `question` in `scope`, or None."""
+        key = self._key(question, scope)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM translations WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE translations SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, question, value, scope=""):
+        """Store `value` for `question` in `scope`, evicting LRU entries past the limit."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._key(question, scope), self.namespace, normalize_question(question),
+                 scope, value, now, now)
+            )
+            self._conn.execute("""
+                DELETE FROM translations WHERE key IN (
+                    SELECT key FROM translations WHERE namespace = ?
+                    ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.namespace, self.max_entries))
+            self._conn.commit()
+
+    def entries(self):
+        """Return (question, scope, value) for every unexpired entry, oldest first."""
+        oldest = time.time() - self.ttl if self.ttl else 0
+        with self._lock:
+            return self._conn.execute(
+                "SELECT question, scope, value FROM translations "
+                "WHERE namespace = ? AND created >= ? ORDER BY last_used",
+                (self.namespace, oldest)
+            ).fetchall()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM translations WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute(
+                "SELECT COUNT(*) FROM translations WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
@@ -1,8 +1,14 @@
 import re
 import textwrap
-from openai_client import get_openai_client
+from openai_client import chat_completion
+from translation_cache import TranslationCache
+from semantic_cache import SemanticCache
+from fast_path import match_mongo
+from schema_pruner import prune_mongo_schema
+from mongo_schema import get_schema_entry, schema_hash
 
 # ───────────────────────── Static schema summary ──────────────────────────────
+# Fallback for when the database cannot be sampled (see mongo_schema.py)
 SCHEMA_INFO = textwrap.dedent(
     """
     Database: sample_mflix
@@ -81,7 +87,18 @@ SCHEMA_INFO = textwrap.dedent(
     """
 )
 
+# NL→PyMongo translations shared by main.py and mongoMain.py (persisted on disk)
+code_cache = TranslationCache("mongo")
+similar_requests = SemanticCache(source=code_cache)
+
 # ───────────────────────── Translator helpers ─────────────────────────────────
+def current_schema() -> tuple:
+    """Return (schema text, cache scope) from the sampled summary, or SCHEMA_INFO if none is available."""
+    entry = get_schema_entry()
+    if entry is None:
+        return SCHEMA_INFO, schema_hash(SCHEMA_INFO)
+    return entry["text"], entry["hash"]
+
 def _sanitize_dollar_keys(expr: str) -> str:
     """Remove accidental spaces before $ operators (e.g., '" $match"')."""
     return re.sub(r'"\s+\$', '"$', expr)
@@ -96,14 +113,31 @@ def _strip_code_fences(expr: str) -> str:
 def translate_nl_to_code(nl_request: str) -> str:
     """Return a single PyMongo expression (string) for the user's request."""
 
-    client = get_openai_client()
-
+    templated = match_mongo(nl_request)
+    if templated is not None:
+        print("Answered from a local query template.")
+        return templated
+
+    # Keyed on the schema hash, so a changed schema invalidates cached translations
+    schema_info, scope = current_schema()
+    cached = code_cache.get(nl_request, scope)
+    if cached is not None:
+        print("Returning cached MongoDB code.")
+        return cached
+
+    match = similar_requests.lookup(nl_request, scope)
+    if match is not None:
+        cached, similarity, cached_request = match
+        print(f"Returning MongoDB code cached for similar request \"{cached_request}\" (similarity {similarity:.2f}).")
+        return cached
+
+    schema = prune_mongo_schema(nl_request, schema_info)
     prompt = textwrap.dedent(f"""
         You are a MongoDB assistant. Variable `db` is a PyMongo Database
         connected to **chatDB**.
 
         Dataset schema:
-        {SCHEMA_INFO}
+        {schema}
 
         Guidelines for output:
         - Use valid Python syntax with quoted string keys and values.
@@ -114,6 +148,7 @@ def translate_nl_to_code(nl_request: str) -> str:
         - When filtering on date‑time strings like `released`, you may use regex:
             {{'$regex': '^2020'}}
         - In projections, include `_id: 0` to exclude the `_id` field.
+        - Prefer filtering and sorting on fields marked [indexed].
         - Avoid leading spaces before `$` in operator names (use "$match", not " $match").
 
         Output exactly one Python expression (no comments, imports, or built‑ins).
@@ -125,7 +160,7 @@ def translate_nl_to_code(nl_request: str) -> str:
         Only output the code expression.
     """)
 
-    resp = client.chat.completions.create(
+    resp = chat_completion(
         model="gpt-4o-mini",
         messages=[{'role': 'system', 'content': prompt}]
     )
@@ -133,4 +168,6 @@ def translate_nl_to_code(nl_request: str) -> str:
     code = resp.choices[0].message.content.strip()
     code = _strip_code_fences(code)
     code = _sanitize_dollar_keys(code)
+    code_cache.put(nl_request, code, scope)
+    similar_requests.add(nl_request, code, scope)
     return code